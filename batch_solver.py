@@ -0,0 +1,89 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+import data_manager
+from csp_solver import solve_csp
+
+# Batch solve banyak file data dengan pembagian waktu round-robin.
+# Setiap instance mendapat irisan waktu (time_limit); yang belum selesai (TIMEOUT) menyimpan
+# checkpoint lalu kembali ke antrean, sehingga instance sulit tidak memonopoli batch dan
+# dapat dilanjutkan pada jalankan berikutnya.
+# Jalankan: python batch_solver.py constraints.json data1.json [data2.json ...] [--slice 5] [--budget 600] [--save]
+
+DEFAULT_SLICE_SECONDS = 5.0
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+
+def checkpoint_path_for(path: str, checkpoint_dir: str) -> str:
+    """Nama checkpoint unik per file: nama dasar + hash path absolut (u1/data.json dan u2/data.json tidak bertabrakan)."""
+    name = os.path.basename(path).rsplit('.', 1)[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(checkpoint_dir, f"{name}-{digest}.checkpoint.json")
+
+def solve_batch(
+    paths: List[str],
+    constraints: Dict[str, Any],
+    slice_seconds: float = DEFAULT_SLICE_SECONDS,
+    budget_seconds: Optional[float] = None,
+    checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    save: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Menyelesaikan setiap file data secara round-robin dalam irisan slice_seconds.
+    Berhenti saat semua selesai atau budget_seconds habis (checkpoint instance yang tersisa tetap disimpan).
+    Hasil per path: status (SUCCESS/FAILURE/TIMEOUT), slices, nodes, seconds.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    started = time.perf_counter()
+    results = {path: {'status': 'TIMEOUT', 'slices': 0, 'nodes': 0, 'seconds': 0.0} for path in paths}
+    queue = deque(paths)
+
+    while queue:
+        if budget_seconds is not None and time.perf_counter() - started >= budget_seconds:
+            break
+        path = queue.popleft()
+        data = data_manager.load_data(path)
+        slice_constraints = {
+            **constraints,
+            'checkpoint_path': checkpoint_path_for(path, checkpoint_dir),
+            'time_limit': slice_seconds,
+        }
+        stats: Dict[str, Any] = {}
+        slice_started = time.perf_counter()
+        schedule, status = solve_csp(data, slice_constraints, stats=stats)
+
+        result = results[path]
+        result['status'] = status
+        result['slices'] += 1
+        result['nodes'] = stats.get('nodes', 0)  # stats dilanjutkan dari checkpoint, jadi sudah kumulatif
+        result['seconds'] += time.perf_counter() - slice_started
+        if status == 'TIMEOUT':
+            queue.append(path)
+        elif save and status == 'SUCCESS':
+            data['generated_schedule'] = schedule
+            data_manager.save_data(data, path)
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Batch solve dengan irisan waktu dan checkpoint")
+    parser.add_argument('constraints', help="file JSON constraints (dipakai untuk semua data)")
+    parser.add_argument('paths', nargs='+', help="file data JSON")
+    parser.add_argument('--slice', type=float, default=DEFAULT_SLICE_SECONDS, help="detik per irisan")
+    parser.add_argument('--budget', type=float, default=None, help="batas total detik untuk batch")
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument('--save', action='store_true', help="simpan generated_schedule untuk yang SUCCESS")
+    args = parser.parse_args(argv)
+
+    with open(args.constraints, 'r') as f:
+        constraints = json.load(f)
+    results = solve_batch(args.paths, constraints, args.slice, args.budget, args.checkpoint_dir, args.save)
+    print(f"{'file':<30} {'status':>8} {'irisan':>6} {'nodes':>10} {'detik':>8}")
+    for path, result in results.items():
+        print(f"{path:<30} {result['status']:>8} {result['slices']:>6} {result['nodes']:>10} {result['seconds']:>8.2f}")
+
+if __name__ == '__main__':
+    main()
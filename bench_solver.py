@@ -0,0 +1,87 @@
+import random
+import sys
+import time
+from typing import List, Dict, Any
+
+from csp_solver import solve_csp, DAYS, get_time_from_index
+
+# Benchmark solver pada minggu padat (acak, seed tetap).
+# Jalankan: python bench_solver.py [jumlah_instance] [rasio_isi] > bench_output.txt
+
+def make_dense_week(seed: int, fill_ratio: float = 0.8) -> Dict[str, Any]:
+    """Membuat data dengan kuliah acak dan aktivitas yang mengisi ~fill_ratio dari jam bebas 08:00-22:00."""
+    rng = random.Random(seed)
+    fixed_schedule = []
+    free_hours = 0
+    for day in DAYS:
+        busy = 0
+        for start in (4, 12, 20):  # 08:00, 12:00, 16:00
+            if rng.random() < 0.6:
+                length = rng.choice([4, 6])
+                fixed_schedule.append({
+                    'name': f"Kuliah {day} {start}",
+                    'day': day,
+                    'start_time': get_time_from_index(start),
+                    'end_time': get_time_from_index(start + length),
+                    'is_locked': True,
+                })
+                busy += length
+        free_hours += (28 - busy) / 2  # 08:00-22:00 = 28 slot
+
+    activities = []
+    total = 0.0
+    i = 0
+    while total + 1 <= free_hours * fill_ratio:
+        duration = rng.choice([1, 1, 2, 2, 3])
+        if total + duration > free_hours * fill_ratio:
+            duration = 1
+        activities.append({
+            'id': f"Act{i}",
+            'name': f"Aktivitas {i % 7}",
+            'duration': duration,
+            'priority': rng.randint(1, 5),
+        })
+        total += duration
+        i += 1
+    return {'fixed_schedule': fixed_schedule, 'activities': activities, 'generated_schedule': {}}
+
+def run(instances: int = 20, fill_ratio: float = 1.0, node_limit: int = 5000) -> List[Dict[str, Any]]:
+    rows = []
+    for seed in range(instances):
+        for ordering in ('default', 'lcv'):
+            data = make_dense_week(seed, fill_ratio)
+            constraints = {
+                'task_earliest_start': '08:00',
+                'task_latest_end': '22:00',
+                'allow_skip_unplaceable': False,
+                'max_search_nodes': node_limit,
+                'value_ordering': ordering,
+            }
+            stats: Dict[str, Any] = {}
+            started = time.perf_counter()
+            _, status = solve_csp(data, constraints, stats=stats)
+            rows.append({
+                'seed': seed,
+                'ordering': ordering,
+                'status': 'LIMIT' if stats.get('aborted') else status,
+                'backtracks': stats.get('backtracks', 0),
+                'nodes': stats.get('nodes', 0),
+                'tt_hit_rate': stats.get('tt_hit_rate', 0.0),
+                'seconds': time.perf_counter() - started,
+            })
+    return rows
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    fill_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    rows = run(count, fill_ratio)
+    print(f"{'seed':>4} {'ordering':>8} {'status':>8} {'backtracks':>10} {'nodes':>8} {'tt hit':>7} {'detik':>8}")
+    for row in rows:
+        print(f"{row['seed']:>4} {row['ordering']:>8} {row['status']:>8} {row['backtracks']:>10} {row['nodes']:>8} "
+              f"{row['tt_hit_rate']:>7.1%} {row['seconds']:>8.3f}")
+    for ordering in ('default', 'lcv'):
+        subset = [r for r in rows if r['ordering'] == ordering]
+        solved = sum(1 for r in subset if r['status'] == 'SUCCESS')
+        print(f"{ordering}: solved {solved}/{len(subset)}, "
+              f"total backtracks {sum(r['backtracks'] for r in subset)}, "
+              f"total detik {sum(r['seconds'] for r in subset):.2f}")
@@ -1,5 +1,15 @@
-from typing import List, Dict, Tuple, Any, Optional
+from typing import List, Dict, Tuple, Any, Optional, Iterator, NamedTuple
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+import hashlib
+import json
 import math
+import os
+import signal
+import threading
+import time
+
+from interval_index import IntervalIndex
 
 # --- Constants ---
 DAYS = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat"]
@@ -9,6 +19,19 @@ SLOT_DURATION = 30  # minutes per slot
 SLOTS_PER_DAY = ((END_HOUR - START_HOUR) * 60) // SLOT_DURATION
 TIME_SLOTS = [f"{h:02d}:{m:02d}" for h in range(START_HOUR, END_HOUR) for m in range(0, 60, SLOT_DURATION)]
 
+ZOBRIST_SEED = b'schedule.ai'
+DEFAULT_TRANSPOSITION_TABLE_SIZE = 100000  # jumlah state gagal yang diingat (LRU); 0 = nonaktif
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_EVERY_NODES = 20000
+DEFAULT_CHECKPOINT_EVERY_SECONDS = 30
+# Kunci constraints yang hanya mengatur jalannya pencarian, tidak mengubah model (diabaikan fingerprint)
+CHECKPOINT_KEYS = ('checkpoint_path', 'checkpoint_every_nodes', 'checkpoint_every_seconds', 'time_limit', 'max_search_nodes')
+
+SOFT_TYPES = ('prefer_window', 'avoid_after', 'avoid_days', 'different_days')
+DEFAULT_SOFT_SKIP_PENALTY = 1000  # biaya per aktivitas yang dilewati saat soft_optimize (harus > penalti preferensi)
+DEFAULT_SOFT_IMPROVE_PASSES = 3  # putaran perbaikan lokal setelah solusi pertama (tanpa soft_optimize)
+
 # --- Helpers ---
 def get_slot_index(time_str: str) -> int:
     """
@@ -22,6 +45,10 @@ def get_slot_index(time_str: str) -> int:
     except:
         return -100 # Default safe index
 
+def get_week_minute(day: str, slot: int) -> int:
+    """Menit absolut sejak Senin 00:00 untuk slot pada hari tertentu (untuk batasan lintas hari)."""
+    return DAYS.index(day) * 24 * 60 + START_HOUR * 60 + slot * SLOT_DURATION
+
 def get_time_from_index(index: int) -> str:
     """Konversi indeks slot kembali ke format waktu 'HH:MM'."""
     minutes_from_start = index * SLOT_DURATION
@@ -63,35 +90,702 @@ def normalize_generated_schedule(raw: Any) -> Dict[str, Dict[str, Dict]]:
 
     return normalized
 
-def get_current_day_stats(schedule: Dict[str, Dict[int, Any]], day: str) -> Tuple[int, Dict[str, float]]:
+def iter_day_placements(day_slots: Dict[Any, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Menggabungkan entri per-slot satu hari menjadi blok penempatan (placement).
+    Slot berurutan dengan nama dan status fixed yang sama digabung, kecuali slot
+    ditandai is_first_slot (awal instance baru) atau panjang blok sudah mencapai duration_slots.
+    Menghasilkan dict: name, start_slot, end_slot, category, priority, is_fixed, is_locked, act.
+    """
+    slots = []
+    for k, act in (day_slots or {}).items():
+        try:
+            slots.append((int(k), act))
+        except (TypeError, ValueError):
+            continue
+    slots.sort(key=lambda item: item[0])
+
+    current = None
+    for slot, act in slots:
+        if not isinstance(act, dict):
+            continue
+        if current is not None:
+            length = current['end_slot'] - current['start_slot']
+            same_block = (
+                slot == current['end_slot']
+                and act.get('name') == current['name']
+                and bool(act.get('is_fixed')) == current['is_fixed']
+                and not act.get('is_first_slot')
+                and not (current['act'].get('duration_slots') and length >= current['act']['duration_slots'])
+            )
+            if same_block:
+                current['end_slot'] = slot + 1
+                continue
+            yield current
+        current = {
+            'name': act.get('name'),
+            'start_slot': slot,
+            'end_slot': slot + 1,
+            'category': act.get('category'),
+            'priority': act.get('priority', 0),
+            'is_fixed': bool(act.get('is_fixed')),
+            'is_locked': bool(act.get('is_locked')),
+            'act': act,
+        }
+    if current is not None:
+        yield current
+
+def extract_placements(schedule: Dict[str, Dict[Any, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Mengembalikan daftar blok penempatan per hari (lihat iter_day_placements)."""
+    return {day: list(iter_day_placements((schedule or {}).get(day, {}))) for day in DAYS}
+
+# --- Placement records ---
+class Placement(NamedTuple):
+    """
+    Satu aktivitas yang terjadwal (immutable). Objek yang sama dibagikan by reference ke setiap slot
+    yang ditutupinya; dict per-slot hanya dibuat saat output lewat to_slot_dict / materialize_schedule.
+    """
+    name: str
+    day: str
+    start_slot: int
+    duration_slots: int
+    priority: Any = 0
+    category: Optional[str] = None
+    is_fixed: bool = False
+    is_locked: bool = False
+    source: Optional[Tuple[Dict, ...]] = None  # dict asli tiap slot terkunci (urut slot), dipertahankan saat output
+
+    @property
+    def end_slot(self) -> int:
+        return self.start_slot + self.duration_slots
+
+    def to_slot_dict(self, slot: int) -> Dict[str, Any]:
+        """Dict per-slot dengan format lama (untuk data.json, display_calendar, dll)."""
+        if self.source is not None:
+            # Slot terkunci dikeluarkan apa adanya (termasuk is_first_slot miliknya sendiri)
+            return {**self.source[slot - self.start_slot], 'is_locked': True}
+        if self.is_fixed:
+            return {
+                'name': self.name,
+                'is_fixed': True,
+                'category': self.category,
+                'is_first_slot': slot == self.start_slot,
+            }
+        return {
+            'name': self.name,
+            'priority': self.priority,
+            'duration_slots': self.duration_slots,
+            'category': self.category,
+            'is_first_slot': slot == self.start_slot,
+        }
+
+def place(day_slots: Dict[int, Any], placement: Placement, overwrite: bool = True):
+    """Memasang placement ke setiap slot yang ditutupinya (referensi yang sama)."""
+    for s in range(placement.start_slot, placement.end_slot):
+        if overwrite or s not in day_slots:
+            day_slots[s] = placement
+
+def get_day_placements(day: str, day_slots: Dict[Any, Any]) -> List[Placement]:
+    """
+    Daftar Placement unik satu hari, terurut menurut slot. Menerima slot berisi Placement
+    maupun dict per-slot format lama (digabung lewat iter_day_placements).
+    """
+    result: List[Placement] = []
+    seen = set()
+    legacy = {}
+    for slot in sorted(day_slots or {}, key=int):
+        value = day_slots[slot]
+        if isinstance(value, Placement):
+            if id(value) not in seen:
+                seen.add(id(value))
+                result.append(value)
+        else:
+            legacy[slot] = value
+    legacy_by_slot = {int(slot): act for slot, act in legacy.items()}
+    for p in iter_day_placements(legacy):
+        source = None
+        if p['is_locked'] and not p['is_fixed']:
+            source = tuple(legacy_by_slot[s] for s in range(p['start_slot'], p['end_slot']))
+        result.append(Placement(
+            p['name'], day, p['start_slot'], p['end_slot'] - p['start_slot'],
+            p['priority'], p['category'], p['is_fixed'], p['is_locked'], source,
+        ))
+    result.sort(key=lambda p: p.start_slot)
+    return result
+
+def materialize_schedule(schedule: Dict[str, Dict[int, Any]]) -> Dict[str, Dict[str, Dict]]:
+    """Mengubah jadwal internal (slot -> Placement) menjadi day -> {slot_str: act_dict}."""
+    return {
+        day: {
+            str(slot): value.to_slot_dict(slot) if isinstance(value, Placement) else value
+            for slot, value in schedule.get(day, {}).items()
+        }
+        for day in DAYS
+    }
+
+def get_current_day_stats(schedule: Dict[str, Dict[Any, Any]], day: str) -> Tuple[int, Dict[str, float]]:
     """
     Menghitung jumlah aktivitas unik dan total jam per kategori untuk hari tertentu.
-    Hanya menghitung aktivitas NON-FIXED.
+    Hanya menghitung aktivitas NON-FIXED. Menerima slot berisi Placement maupun dict per-slot
+    (lewat get_day_placements), sama dengan counter yang dijaga SearchState.
     """
     unique_activities = set()
-    category_hours = {}
+    category_hours: Dict[str, float] = {}
+    for p in get_day_placements(day, schedule.get(day, {})):
+        if p.is_fixed:  # Abaikan fixed tasks
+            continue
+        unique_activities.add(p.name)
+        if p.category:
+            category_hours[p.category] = category_hours.get(p.category, 0.0) + p.duration_slots * SLOT_DURATION / 60.0
+    return len(unique_activities), category_hours
 
-    for slot, act in schedule[day].items():
-        if not act or act.get('is_fixed'): # Abaikan fixed tasks
+# --- Incremental search state ---
+LOW_PRIORITY_LEVELS = (1, 2)
+
+def get_duration_slots(activity: Dict) -> int:
+    """Durasi aktivitas (jam) dalam jumlah slot, minimal 1."""
+    return max(1, int(activity['duration'] * 60) // SLOT_DURATION)
+
+def get_resources(activity: Dict) -> List[str]:
+    """Nama resource bersama (lapangan, lab, tutor) yang dipakai activity; masing-masing 1 unit per slot."""
+    resources = activity.get('resources') or []
+    return [resources] if isinstance(resources, str) else list(resources)
+
+def _hours_to_slots(hours: Any) -> int:
+    """Konversi batas jam ke jumlah slot (dibulatkan ke bawah)."""
+    return int(math.floor(float(hours) * 60 / SLOT_DURATION + 1e-9))
+
+def is_low_priority(priority: Any) -> bool:
+    """Prioritas 1/2 dianggap prioritas rendah."""
+    try:
+        return int(priority) in LOW_PRIORITY_LEVELS
+    except (TypeError, ValueError):
+        return False
+
+def get_task_window(activity: Dict, constraints: Dict) -> Tuple[int, int]:
+    """
+    Rentang [slot mulai paling awal, slot selesai paling akhir] untuk activity.
+    Prioritas: Properti Aktivitas > Batasan Per-Task > Global Default.
+    """
+    act_name = activity.get('name')
+    act_constraints = constraints.get(act_name, {}) if act_name else {}
+
+    task_earliest = (
+        activity.get('earliest_start') or 
+        act_constraints.get('earliest_start') or 
+        constraints.get('task_earliest_start')
+    )
+    task_latest_end = (
+        activity.get('latest_end') or 
+        act_constraints.get('latest_end') or 
+        constraints.get('task_latest_end')
+    )
+    earliest_slot = get_slot_index(task_earliest) if task_earliest else 0
+    latest_end_slot = get_slot_index(task_latest_end) if task_latest_end else SLOTS_PER_DAY
+    return earliest_slot, latest_end_slot
+
+def parse_after(after_list: Any) -> List[Tuple[str, Optional[int], Optional[int], bool]]:
+    """
+    Normalisasi daftar 'after' menjadi tuple (nama, min_gap_menit, max_gap_menit, same_day).
+    Entri boleh berupa nama saja, atau dict: {'name', 'min_gap_hours', 'max_gap_hours', 'same_day'}.
+    """
+    specs = []
+    for entry in after_list or []:
+        if isinstance(entry, dict):
+            if not entry.get('name'):
+                continue
+            min_gap = entry.get('min_gap_hours')
+            max_gap = entry.get('max_gap_hours')
+            specs.append((
+                entry['name'],
+                int(float(min_gap) * 60) if min_gap is not None else None,
+                int(float(max_gap) * 60) if max_gap is not None else None,
+                bool(entry.get('same_day', False)),
+            ))
+        else:
+            specs.append((entry, None, None, False))
+    return specs
+
+def parse_soft_preferences(entries: Any) -> List[Dict[str, Any]]:
+    """
+    Normalisasi constraints['soft_preferences'] (preferensi lunak berbobot). Setiap entri:
+      {'type': 'prefer_window', 'name'/'category', 'start': 'HH:MM', 'end': 'HH:MM', 'weight'}  penalti per slot di luar jendela
+      {'type': 'avoid_after', 'name'/'category', 'time': 'HH:MM', 'weight'}                    penalti per slot setelah time
+      {'type': 'avoid_days', 'name'/'category', 'days': [...], 'weight'}                       penalti per penempatan pada hari itu
+      {'type': 'different_days', 'name'/'category', 'weight'}                                  penalti per pasangan pada hari yang sama
+    Tanpa name/category, entri berlaku untuk semua aktivitas non-fixed. Entri tidak dikenal dilewati.
+    """
+    rules = []
+    for entry in entries or []:
+        if not isinstance(entry, dict) or entry.get('type') not in SOFT_TYPES:
             continue
-        
-        name = act.get('name')
-        category = act.get('category')
-        
-        # Hitung unik (asumsi semua slot dari satu aktivitas memiliki nama yang sama)
-        if name:
-            unique_activities.add(name)
-        
-        # Hitung jam per kategori (hanya hitung sekali per slot)
+        try:
+            weight = float(entry.get('weight', 1))
+        except (TypeError, ValueError):
+            continue
+        if weight <= 0:
+            continue
+        rule = {'type': entry['type'], 'name': entry.get('name'), 'category': entry.get('category'), 'weight': weight}
+        if entry['type'] == 'prefer_window':
+            rule['start'] = max(0, get_slot_index(entry.get('start', '06:00')))
+            rule['end'] = min(SLOTS_PER_DAY, get_slot_index(entry.get('end', '24:00')))
+        elif entry['type'] == 'avoid_after':
+            rule['after'] = max(0, get_slot_index(entry.get('time', '24:00')))
+        elif entry['type'] == 'avoid_days':
+            days = entry.get('days') or []
+            rule['days'] = [day for day in ([days] if isinstance(days, str) else days) if day in DAYS]
+        rules.append(rule)
+    return rules
+
+def soft_rule_matches(rule: Dict[str, Any], name: str, category: Optional[str]) -> bool:
+    """Apakah preferensi berlaku untuk aktivitas bernama name dengan kategori category."""
+    if rule['name'] is not None and rule['name'] != name:
+        return False
+    return rule['category'] is None or rule['category'] == category
+
+def precedence_violation(
+    starts: List[int],
+    ends: List[int],
+    start_minute: int,
+    end_minute: int,
+    spec: Tuple[str, Optional[int], Optional[int], bool],
+    is_self: bool,
+    day_start_minute: int,
+    required: bool,
+) -> Optional[str]:
+    """
+    Mengecek satu batasan 'after' untuk interval [start_minute, end_minute) (menit mingguan)
+    terhadap penempatan pendahulu yang sudah terurut (starts/ends). Pendahulu adalah penempatan
+    terakhir yang selesai sebelum start_minute. Untuk pendahulu bernama sama (misalnya Gym setelah Gym),
+    min_gap berlaku dua arah. Mengembalikan alasan pelanggaran atau None.
+    """
+    prev_name, min_gap, max_gap, same_day = spec
+    # Arah sebaliknya untuk nama sama: instance berikutnya juga harus berjarak min_gap,
+    # termasuk saat penempatan ini belum punya pendahulu (instance paling awal)
+    if is_self and min_gap is not None:
+        j = bisect_left(starts, end_minute)
+        next_start = starts[j] if j < len(starts) else None
+        if same_day and next_start is not None and next_start >= day_start_minute + SLOTS_PER_DAY * SLOT_DURATION:
+            next_start = None
+        if next_start is not None and next_start - end_minute < min_gap:
+            return f"harus berjarak minimal {min_gap / 60:g} jam dari '{prev_name}' berikutnya"
+
+    i = bisect_right(ends, start_minute) - 1
+    prev_end = ends[i] if i >= 0 else None
+    if same_day and prev_end is not None and prev_end < day_start_minute:
+        prev_end = None
+
+    if prev_end is None:
+        if is_self or not required:
+            return None
+        where = "pada hari yang sama" if same_day else "minggu ini"
+        return f"harus dijadwalkan setelah '{prev_name}' {where}"
+
+    gap = start_minute - prev_end
+    if min_gap is not None and gap < min_gap:
+        return f"harus berjarak minimal {min_gap / 60:g} jam setelah '{prev_name}'"
+    if max_gap is not None and gap > max_gap:
+        return f"harus berjarak maksimal {max_gap / 60:g} jam setelah '{prev_name}'"
+    return None
+
+class SearchState:
+    """
+    Jadwal yang sedang dibangun beserta counter per hari yang diperbarui secara inkremental
+    pada setiap assign/unassign, sehingga batasan global cukup dicek dalam O(1).
+    Counter hanya menghitung aktivitas NON-FIXED (sama seperti get_current_day_stats).
+    """
+
+    def __init__(self, schedule: Dict[str, Dict[int, Any]], constraints: Dict):
+        self.schedule = schedule
+        self.constraints = constraints
+
+        # Batasan global di-parse sekali per pencarian
+        self.mandatory_day_off = constraints.get('global_mandatory_day_off')
+        self.forbidden_blocks = [
+            (get_slot_index(start_time), get_slot_index(end_time))
+            for start_time, end_time in constraints.get('global_no_activity_blocks', []) or []
+        ]
+        self.min_gap_slots = None
+        if constraints.get('global_min_gap') is not None:
+            self.min_gap_slots = max(1, math.ceil(int(constraints['global_min_gap']) / SLOT_DURATION))
+
+        # global_max_tasks_per_day dan global_max_unique_activities_per_day bermakna sama
+        unique_limits = [
+            int(constraints[key])
+            for key in ('global_max_tasks_per_day', 'global_max_unique_activities_per_day')
+            if constraints.get(key) is not None
+        ]
+        self.max_unique_per_day = min(unique_limits) if unique_limits else None
+        self.max_slots_per_day = None
+        if constraints.get('global_max_hours_per_day') is not None:
+            self.max_slots_per_day = _hours_to_slots(constraints['global_max_hours_per_day'])
+        self.max_low_priority_per_day = None
+        if constraints.get('global_max_low_priority_per_day') is not None:
+            self.max_low_priority_per_day = int(constraints['global_max_low_priority_per_day'])
+        self.max_work_days = None
+        if constraints.get('global_max_work_days') is not None:
+            self.max_work_days = int(constraints['global_max_work_days'])
+        self.max_category_slots = {
+            category: _hours_to_slots(hours)
+            for category, hours in (constraints.get('global_max_hours_per_category_per_day', {}) or {}).items()
+        }
+
+        # Resource bersama (mode multi-user, lihat multi_user.py):
+        # resource_blocked = {resource: {day: [[start_slot, end_slot], ...]}} slot yang kapasitasnya sudah habis (hard),
+        # resource_prices = {resource: {day: [harga per slot]}} biaya lunak untuk urutan nilai
+        self.resource_blocked = {
+            resource: {day: IntervalIndex(map(tuple, blocks.get(day, [])), SLOTS_PER_DAY) for day in DAYS}
+            for resource, blocks in (constraints.get('resource_blocked') or {}).items()
+        }
+        self.resource_price_prefix: Dict[str, Dict[str, List[float]]] = {}
+        for resource, day_prices in (constraints.get('resource_prices') or {}).items():
+            self.resource_price_prefix[resource] = {}
+            for day, prices in day_prices.items():
+                prefix = [0.0]
+                for price in prices:
+                    prefix.append(prefix[-1] + float(price))
+                self.resource_price_prefix[resource][day] = prefix
+
+        # Preferensi lunak (soft_preferences): total penalti jadwal saat ini dijaga inkremental di _count,
+        # soft_day_counts[i][day] = jumlah penempatan yang cocok dengan aturan different_days ke-i
+        self.soft_rules = parse_soft_preferences(constraints.get('soft_preferences'))
+        self.soft_cost = 0.0
+        self.soft_day_counts: List[Optional[Dict[str, int]]] = [
+            {day: 0 for day in DAYS} if rule['type'] == 'different_days' else None for rule in self.soft_rules
+        ]
+        self._soft_profiles: Dict[Tuple[str, Optional[str]], Tuple] = {}
+
+        # Indeks interval statis per hari: jadwal awal (fixed/terkunci) tidak berubah selama pencarian,
+        # blocked_index menambahkan blok waktu terlarang (berlaku untuk aktivitas non-fixed)
+        initial_placements = {day: get_day_placements(day, schedule.get(day, {})) for day in DAYS}
+        static_intervals = {
+            day: [(p.start_slot, p.end_slot) for p in initial_placements[day]]
+            for day in DAYS
+        }
+        self.static_index = {day: IntervalIndex(static_intervals[day], SLOTS_PER_DAY) for day in DAYS}
+        self.blocked_index = {
+            day: IntervalIndex(static_intervals[day] + self.forbidden_blocks, SLOTS_PER_DAY) for day in DAYS
+        }
+
+        # Bitmask slot terisi per hari (blok statis + penempatan selama pencarian), untuk skor LCV
+        self.occupied_mask: Dict[str, int] = {}
+        for day in DAYS:
+            mask = 0
+            for start, end in zip(self.blocked_index[day].starts, self.blocked_index[day].ends):
+                mask |= ((1 << (end - start)) - 1) << start
+            self.occupied_mask[day] = mask
+
+        # Statistik pencarian dan durasi aktivitas tersisa per indeks (diisi oleh csp_backtracking)
+        self.stats: Dict[str, Any] = {
+            'nodes': 0, 'backtracks': 0, 'skips': 0, 'tt_probes': 0, 'tt_hits': 0, 'tt_stores': 0,
+            'soft_solutions': 0, 'soft_pruned': 0, 'soft_moves': 0,
+        }
+        self.suffix_durations: List[Dict[int, int]] = []
+
+        # Hash Zobrist penempatan selama pencarian (jadwal awal konstan, jadi tidak ikut di-hash).
+        # Kunci 64-bit per token diturunkan dari token itu sendiri (blake2b ber-seed), sehingga sama
+        # antar proses dan tidak bergantung urutan pemakaian (perlu untuk resume dari checkpoint).
+        self.zobrist = 0
+        self._zobrist_keys: Dict[Any, int] = {}
+        self._signatures: Dict[int, Tuple] = {}
+        # Transposition table (hash state -> gagal), diisi oleh csp_backtracking bila aktif
+        self.transposition: Optional[OrderedDict] = None
+        self.transposition_size = 0
+        self.suffix_zobrist: List[int] = []
+        # Branch-and-bound soft_optimize (diisi oleh csp_backtracking): batas bawah penalti activities[i:]
+        # dan solusi terbaik sejauh ini {'cost', 'skips', 'placements': [[indeks, hari, slot], ...]}
+        self.soft_bounds: List[float] = []
+        self.incumbent: Optional[Dict[str, Any]] = None
+
+        # Counter inkremental
+        self.name_counts: Dict[str, Dict[str, int]] = {day: {} for day in DAYS}
+        self.category_slots: Dict[str, Dict[str, int]] = {day: {} for day in DAYS}
+        self.used_slots: Dict[str, int] = {day: 0 for day in DAYS}
+        self.low_priority_counts: Dict[str, int] = {day: 0 for day in DAYS}
+        self.work_days = 0
+        # Indeks nama -> interval penempatan (menit mingguan, terurut), termasuk fixed
+        self.intervals_by_name: Dict[str, Tuple[List[int], List[int]]] = {}
+        # Indeks balik 'after': pendahulu -> [(nama dependen, min_gap_menit, same_day)], dibangun saat pertama dipakai
+        self._dependents: Optional[Dict[str, List[Tuple[str, int, bool]]]] = None
+
+        for day in DAYS:
+            for p in initial_placements[day]:
+                self._count(day, p.name, p.start_slot, p.duration_slots, p.category, p.priority, p.is_fixed, 1)
+
+    def _count(self, day: str, name: str, start_slot: int, length: int, category: Optional[str], priority: Any, is_fixed: bool, sign: int):
+        starts, ends = self.intervals_by_name.setdefault(name, ([], []))
+        start_minute = get_week_minute(day, start_slot)
+        end_minute = start_minute + length * SLOT_DURATION
+        if sign > 0:
+            insort(starts, start_minute)
+            insort(ends, end_minute)
+        else:
+            del starts[bisect_left(starts, start_minute)]
+            del ends[bisect_left(ends, end_minute)]
+
+        if is_fixed:
+            return
+
+        counts = self.name_counts[day]
+        counts[name] = counts.get(name, 0) + sign
+        if not counts[name]:
+            del counts[name]
+
         if category:
-            # Menggunakan duration_slots jika tersedia, jika tidak, hitung 1 slot
-            duration = act.get('duration_slots', 1) * SLOT_DURATION / 60.0
-            # Untuk menghindari penghitungan berulang per slot untuk durasi penuh,
-            # hanya tambahkan durasi satu slot (0.5 jam)
-            if act.get('is_first_slot') or not act.get('is_first_slot') and not act.get('duration_slots'):
-                 category_hours[category] = category_hours.get(category, 0.0) + (SLOT_DURATION / 60.0)
+            self.category_slots[day][category] = self.category_slots[day].get(category, 0) + sign * length
 
-    return len(unique_activities), category_hours
+        was_work_day = self.used_slots[day] > 0
+        self.used_slots[day] += sign * length
+        if (self.used_slots[day] > 0) != was_work_day:
+            self.work_days += sign
+
+        if is_low_priority(priority):
+            self.low_priority_counts[day] += sign
+
+        if self.soft_rules:
+            pairs = self.soft_profile(name, category)[2]
+            if sign < 0:
+                for i, _ in pairs:
+                    self.soft_day_counts[i][day] -= 1
+            # penalti dihitung terhadap penempatan lain (tanpa penempatan ini sendiri)
+            self.soft_cost += sign * self.soft_delta(day, start_slot, length, name, category)
+            if sign > 0:
+                for i, _ in pairs:
+                    self.soft_day_counts[i][day] += 1
+
+    def soft_profile(self, name: str, category: Optional[str]) -> Tuple:
+        """
+        Ringkasan preferensi yang berlaku untuk (name, category), di-cache:
+        (prefix penalti per slot atau None, penalti per hari, [(indeks aturan different_days, bobot)]).
+        """
+        key = (name, category)
+        profile = self._soft_profiles.get(key)
+        if profile is None:
+            slot_costs = [0.0] * SLOTS_PER_DAY
+            day_costs: Dict[str, float] = {}
+            pairs = []
+            for i, rule in enumerate(self.soft_rules):
+                if not soft_rule_matches(rule, name, category):
+                    continue
+                weight = rule['weight']
+                if rule['type'] == 'prefer_window':
+                    for s in range(SLOTS_PER_DAY):
+                        if s < rule['start'] or s >= rule['end']:
+                            slot_costs[s] += weight
+                elif rule['type'] == 'avoid_after':
+                    for s in range(rule['after'], SLOTS_PER_DAY):
+                        slot_costs[s] += weight
+                elif rule['type'] == 'avoid_days':
+                    for day in rule['days']:
+                        day_costs[day] = day_costs.get(day, 0.0) + weight
+                else:
+                    pairs.append((i, weight))
+            prefix = None
+            if any(slot_costs):
+                prefix = [0.0]
+                for cost in slot_costs:
+                    prefix.append(prefix[-1] + cost)
+            profile = self._soft_profiles[key] = (prefix, day_costs, pairs)
+        return profile
+
+    def soft_delta(self, day: str, start_slot: int, length: int, name: str, category: Optional[str]) -> float:
+        """Tambahan penalti lunak jika (name, category) ditempatkan di [start_slot, start_slot+length) pada day, O(aturan)."""
+        prefix, day_costs, pairs = self.soft_profile(name, category)
+        cost = day_costs.get(day, 0.0)
+        if prefix:
+            cost += prefix[min(start_slot + length, SLOTS_PER_DAY)] - prefix[max(0, start_slot)]
+        for i, weight in pairs:
+            cost += weight * self.soft_day_counts[i][day]
+        return cost
+
+    def soft_lower_bound(self, activity: Dict, constraints: Dict) -> float:
+        """Penalti minimum activity di posisi mana pun dalam jendela tugasnya (different_days diabaikan, >= 0)."""
+        prefix, day_costs, _ = self.soft_profile(activity['name'], activity.get('category'))
+        duration_slots = get_duration_slots(activity)
+        earliest_slot, latest_end_slot = get_task_window(activity, constraints)
+        starts = range(max(0, earliest_slot), min(SLOTS_PER_DAY, latest_end_slot) - duration_slots + 1)
+        if not starts:
+            return 0.0
+        window_cost = min(prefix[s + duration_slots] - prefix[s] for s in starts) if prefix else 0.0
+        return window_cost + min(day_costs.get(day, 0.0) for day in DAYS)
+
+    def zobrist_key(self, token: Any) -> int:
+        key = self._zobrist_keys.get(token)
+        if key is None:
+            digest = hashlib.blake2b(repr(token).encode(), digest_size=8, key=ZOBRIST_SEED).digest()
+            key = self._zobrist_keys[token] = int.from_bytes(digest, 'big')
+        return key
+
+    def signature(self, activity: Dict) -> Tuple:
+        """
+        Atribut activity yang menentukan feasibility; instance dengan signature sama dapat dipertukarkan.
+        id diabaikan dan prioritas hanya dibedakan rendah/tidak (satu-satunya efeknya pada batasan).
+        """
+        cached = self._signatures.get(id(activity))
+        if cached is None:
+            cached = self._signatures[id(activity)] = tuple(sorted(
+                (k, repr(is_low_priority(v) if k == 'priority' else v)) for k, v in activity.items() if k != 'id'
+            ))
+        return cached
+
+    def assign(self, day: str, start_slot: int, activity: Dict):
+        """Menempatkan activity (satu Placement yang dibagikan ke semua slotnya) dan memperbarui counter."""
+        duration_slots = get_duration_slots(activity)
+        placement = Placement(
+            activity['name'], day, start_slot, duration_slots,
+            activity.get('priority', 0), activity.get('category'), bool(activity.get('is_fixed')),
+        )
+        day_slots = self.schedule[day]
+        for s in range(start_slot, start_slot + duration_slots):
+            day_slots[s] = placement
+        self.occupied_mask[day] |= ((1 << duration_slots) - 1) << start_slot
+        self.zobrist ^= self.zobrist_key((day, start_slot, self.signature(activity)))
+        self._count(
+            day, activity['name'], start_slot, duration_slots, activity.get('category'),
+            activity.get('priority', 0), bool(activity.get('is_fixed')), 1,
+        )
+
+    def unassign(self, day: str, start_slot: int, activity: Dict):
+        """Membatalkan assign() dengan argumen yang sama."""
+        duration_slots = get_duration_slots(activity)
+        for s in range(start_slot, start_slot + duration_slots):
+            del self.schedule[day][s]
+        self.occupied_mask[day] &= ~(((1 << duration_slots) - 1) << start_slot)
+        self.zobrist ^= self.zobrist_key((day, start_slot, self.signature(activity)))
+        self._count(
+            day, activity['name'], start_slot, duration_slots, activity.get('category'),
+            activity.get('priority', 0), bool(activity.get('is_fixed')), -1,
+        )
+
+    def day_open(self, day: str, activity: Dict, duration_slots: Optional[int] = None) -> bool:
+        """
+        O(1): apakah hari ini masih termasuk domain activity menurut batasan counter global
+        (hari bebas wajib, jam per hari, hari kerja, aktivitas unik, prioritas rendah, jam per kategori).
+        """
+        if activity.get('is_fixed'):
+            return True
+        if duration_slots is None:
+            duration_slots = get_duration_slots(activity)
+
+        if self.mandatory_day_off and day == self.mandatory_day_off:
+            return False
+
+        if self.max_slots_per_day is not None and self.used_slots[day] + duration_slots > self.max_slots_per_day:
+            return False
+
+        if self.max_work_days is not None and self.used_slots[day] == 0 and self.work_days >= self.max_work_days:
+            return False
+
+        if self.max_unique_per_day is not None:
+            counts = self.name_counts[day]
+            if activity['name'] not in counts and len(counts) + 1 > self.max_unique_per_day:
+                return False
+
+        if self.max_low_priority_per_day is not None and is_low_priority(activity.get('priority', 0)):
+            if self.low_priority_counts[day] + 1 > self.max_low_priority_per_day:
+                return False
+
+        category = activity.get('category')
+        if category and category in self.max_category_slots:
+            if self.category_slots[day].get(category, 0) + duration_slots > self.max_category_slots[category]:
+                return False
+
+        return True
+
+    def is_placed(self, name: str) -> bool:
+        """Apakah sudah ada penempatan (termasuk fixed/terkunci) dengan nama ini."""
+        return bool(self.intervals_by_name.get(name, ([], []))[0])
+
+    def precedence_ok(self, day: str, start_slot: int, end_slot: int, activity: Dict,
+                      activities_indexed_by_name: Dict[str, Dict]) -> bool:
+        """Cek semua batasan 'after' activity lewat indeks nama -> interval (O(log n) per batasan)."""
+        start_minute = get_week_minute(day, start_slot)
+        end_minute = start_minute + (end_slot - start_slot) * SLOT_DURATION
+        day_start_minute = get_week_minute(day, 0)
+        for spec in parse_after(activity.get('after')):
+            starts, ends = self.intervals_by_name.get(spec[0], ([], []))
+            reason = precedence_violation(
+                starts, ends, start_minute, end_minute, spec,
+                spec[0] == activity['name'], day_start_minute, spec[0] in activities_indexed_by_name,
+            )
+            if reason:
+                return False
+        return True
+
+    def dependents_ok(self, day: str, start_slot: int, end_slot: int, activity: Dict,
+                      activities_indexed_by_name: Dict[str, Dict]) -> bool:
+        """
+        Cek balik 'after': activity tidak boleh menjadi pendahulu yang terlalu dekat (< min_gap) bagi
+        penempatan lain yang sudah ada dan 'after' activity. Cukup dependen pertama yang mulai setelah
+        activity selesai; pendahulu lama yang lebih dekat sudah dicek saat dependen itu ditempatkan.
+        """
+        if self._dependents is None:
+            self._dependents = {}
+            for dependent in activities_indexed_by_name.values():
+                for prev_name, min_gap, _, same_day in parse_after(dependent.get('after')):
+                    # pendahulu bernama sama sudah dicek dua arah di precedence_violation
+                    if min_gap and prev_name != dependent['name']:
+                        self._dependents.setdefault(prev_name, []).append((dependent['name'], min_gap, same_day))
+        dependents = self._dependents.get(activity['name'])
+        if not dependents:
+            return True
+
+        end_minute = get_week_minute(day, end_slot)
+        day_end_minute = get_week_minute(day, SLOTS_PER_DAY)
+        for dependent_name, min_gap, same_day in dependents:
+            starts = self.intervals_by_name.get(dependent_name, ([], []))[0]
+            i = bisect_left(starts, end_minute)
+            if i == len(starts) or starts[i] - end_minute >= min_gap:
+                continue
+            # same_day: pendahulu di hari lain tidak dihitung sebagai pendahulu dependen itu
+            if same_day and starts[i] >= day_end_minute:
+                continue
+            return False
+        return True
+
+    def eliminated_starts(self, day: str, start_slot: int, duration_slots: int, remaining: Dict[int, int]) -> int:
+        """
+        Skor least-constraining-value: jumlah posisi mulai yang hilang bagi aktivitas tersisa
+        (remaining: durasi_slot -> jumlah) jika [start_slot, start_slot + duration_slots) diisi.
+        Cukup melihat celah bebas yang memuat penempatan ini, lewat bitmask hari tersebut.
+        """
+        mask = self.occupied_mask[day]
+        end_slot = start_slot + duration_slots
+        run_start = (mask & ((1 << start_slot) - 1)).bit_length()
+        after = mask >> end_slot
+        run_end = end_slot + (after & -after).bit_length() - 1 if after else SLOTS_PER_DAY
+        run_length = run_end - run_start
+        left = start_slot - run_start
+        right = run_end - end_slot
+
+        eliminated = 0
+        for length, count in remaining.items():
+            before = max(0, run_length - length + 1)
+            kept = max(0, left - length + 1) + max(0, right - length + 1)
+            eliminated += count * (before - kept)
+        return eliminated
+
+    def resource_ok(self, day: str, start_slot: int, end_slot: int, activity: Dict) -> bool:
+        """Apakah [start_slot, end_slot) tidak memakai slot resource yang kapasitasnya sudah habis."""
+        for resource in get_resources(activity):
+            blocked = self.resource_blocked.get(resource)
+            if blocked is not None and blocked[day].overlaps(start_slot, end_slot):
+                return False
+        return True
+
+    def resource_cost(self, day: str, start_slot: int, end_slot: int, activity: Dict) -> float:
+        """Jumlah harga resource (resource_prices) pada slot yang ditutupi penempatan, O(1) per resource."""
+        cost = 0.0
+        for resource in get_resources(activity):
+            prefix = self.resource_price_prefix.get(resource, {}).get(day)
+            if prefix:
+                cost += prefix[min(end_slot, len(prefix) - 1)] - prefix[min(start_slot, len(prefix) - 1)]
+        return cost
+
+    def has_open_day(self, activity: Dict) -> bool:
+        """Forward check: masih adakah hari yang terbuka untuk activity."""
+        duration_slots = get_duration_slots(activity)
+        return any(self.day_open(day, activity, duration_slots) for day in DAYS)
 
 # --- Constraint checking ---
 def is_valid(
@@ -101,46 +795,48 @@ def is_valid(
     activity: Dict,
     constraints: Dict,
     activities_indexed_by_name: Dict[str, Dict],
+    state: Optional[SearchState] = None,
 ) -> bool:
     """
     Memeriksa apakah penempatan activity pada day dimulai di start_slot valid,
     mempertimbangkan batasan per-task, global, dan yang baru direfaktor.
+    Jika state tidak diberikan, counter dibangun ulang dari schedule (lebih lambat).
     """
-    duration_slots = max(1, int(activity['duration'] * 60) // SLOT_DURATION)
+    if state is None:
+        state = SearchState(schedule, constraints)
+
+    duration_slots = get_duration_slots(activity)
     end_slot = start_slot + duration_slots
     
     # 0. Batasan Durasi (Waktu)
     if end_slot > SLOTS_PER_DAY or start_slot < 0:
         return False
 
-    # 1. Batasan Hari Bebas Wajib (Pilihan Baru 5)
-    mandatory_day_off = constraints.get('global_mandatory_day_off')
-    if mandatory_day_off and day == mandatory_day_off:
-        # Jika bukan fixed task, tidak boleh dijadwalkan pada hari ini
-        if not activity.get('is_fixed'):
-            return False
+    # 1-2. Batasan counter harian/mingguan (O(1) dari state):
+    # hari bebas wajib, maks jam per hari, maks hari kerja, maks aktivitas unik,
+    # maks prioritas rendah, dan maks jam per kategori per hari
+    if not state.day_open(day, activity, duration_slots):
+        return False
+
+    # 3-4. Jadwal awal (fixed/terkunci) dan Time Blocking Global (Blok Waktu Terlarang)
+    # Dicek lewat indeks interval per hari dalam O(log n); blok terlarang tidak berlaku untuk fixed
+    index = state.static_index[day] if activity.get('is_fixed') else state.blocked_index[day]
+    if index.overlaps(start_slot, end_slot):
+        return False
+
+    # Resource bersama yang kapasitasnya sudah habis pada slot ini (mode multi-user)
+    if state.resource_blocked and not state.resource_ok(day, start_slot, end_slot, activity):
+        return False
 
-    # 2. Tidak tumpang tindih dengan jadwal yang sudah ada
+    # Tidak tumpang tindih dengan aktivitas yang ditempatkan selama pencarian
     for s in range(start_slot, end_slot):
         if s in schedule[day]:
             return False
 
-    # 3. Time Blocking Global (Blok Waktu Terlarang) (Pilihan Baru 1)
-    # Aktivitas (kecuali fixed) tidak boleh dijadwalkan jika tumpang tindih dengan blok terlarang
-    forbidden_blocks = constraints.get('global_no_activity_blocks', [])
-    for start_time, end_time in forbidden_blocks:
-        block_start_slot = get_slot_index(start_time)
-        block_end_slot = get_slot_index(end_time)
-        
-        # Cek jika ada tumpang tindih antara [start_slot, end_slot) dan [block_start_slot, block_end_slot)
-        if start_slot < block_end_slot and end_slot > block_start_slot:
-            return False # Aktivitas tumpang tindih dengan blok terlarang
-
-    # 4. Global Min Gap (Jeda/Gap Minimum) (Pilihan Baru 3)
+    # 5. Global Min Gap (Jeda/Gap Minimum)
     # Memastikan ada gap minimum antara aktivitas yang baru dan aktivitas yang sudah ada (fixed/non-fixed)
-    if constraints.get('global_min_gap') is not None:
-        min_gap_minutes = int(constraints['global_min_gap'])
-        min_gap_slots = max(1, math.ceil(min_gap_minutes / SLOT_DURATION))
+    if state.min_gap_slots is not None:
+        min_gap_slots = state.min_gap_slots
         
         # Cek gap SEBELUM aktivitas dimulai
         for gap_i in range(1, min_gap_slots + 1):
@@ -155,176 +851,545 @@ def is_valid(
             if next_slot in schedule[day] and schedule[day][next_slot] is not None:
                 return False
 
-    # Dapatkan statistik hari ini (hanya hitungan aktivitas non-fixed)
-    current_task_count, current_category_hours = get_current_day_stats(schedule, day)
-    
-    # 5. Global Max Tasks per Day (Pilihan Baru 2)
-    # Maksimal jumlah aktivitas unik (non-fixed) yang dijadwalkan per hari
-    if constraints.get('global_max_tasks_per_day') is not None:
-        max_tasks = int(constraints['global_max_tasks_per_day'])
-        
-        # Jika aktivitas ini BELUM ada di jadwal hari ini, hitungannya bertambah 1
-        is_new_task_for_day = activity['name'] not in [
-            act.get('name') for slot, act in schedule[day].items() if act and not act.get('is_fixed')
-        ]
-        
-        current_count_plus_one = current_task_count + (1 if is_new_task_for_day else 0)
-        
-        if current_count_plus_one > max_tasks:
-            return False
+    # --- Sisa Batasan Lama (Task-based) ---
+    # Task-based earliest / latest end (Prioritas: Properti Aktivitas > Batasan Per-Task > Global Default)
+    earliest_slot, latest_end_slot = get_task_window(activity, constraints)
+    if start_slot < earliest_slot or end_slot > latest_end_slot:
+        return False
 
-    # 6. Global Max Hours per Category per Day (Pilihan Baru 4)
-    # Batasan total jam per kategori (e.g., Belajar: max 4 jam)
-    max_category_hours = constraints.get('global_max_hours_per_category_per_day', {})
-    category = activity.get('category')
-    
-    if category and category in max_category_hours:
-        max_limit = float(max_category_hours[category])
-        activity_duration_hours = duration_slots * SLOT_DURATION / 60.0
-        
-        # Hitung total jam saat ini (current_category_hours dihitung per slot 0.5 jam)
-        current_category_hours_for_cat = current_category_hours.get(category, 0.0)
-        
-        # Total baru = jam saat ini + durasi aktivitas baru
-        new_total_hours = current_category_hours_for_cat + activity_duration_hours
-        
-        if new_total_hours > max_limit:
-            return False
+    # Task 'after' constraints: activity must be after listed activities
+    # Berlaku lintas hari (seluruh minggu), opsional dengan jarak minimum/maksimum;
+    # pendahulu dicari lewat indeks nama -> interval, bukan dengan memindai slot.
+    if activity.get('after') and not state.precedence_ok(day, start_slot, end_slot, activity, activities_indexed_by_name):
+        return False
+    # ... dan penempatan ini tidak boleh masuk ke jarak minimum dependen yang sudah ditempatkan
+    if not state.dependents_ok(day, start_slot, end_slot, activity, activities_indexed_by_name):
+        return False
 
-    # --- Sisa Batasan Lama (Task-based) ---
-    # Logika diperbarui untuk memprioritaskan batasan per-task (keyed by name)
-    act_name = activity.get('name')
-    act_constraints = constraints.get(act_name, {}) if act_name else {}
+    return True
 
-    # Task-based earliest (Prioritas: Properti Aktivitas > Batasan Per-Task > Global Default)
-    task_earliest = (
-        activity.get('earliest_start') or 
-        act_constraints.get('earliest_start') or 
-        constraints.get('task_earliest_start')
-    )
-    if task_earliest:
-        if start_slot < get_slot_index(task_earliest):
-            return False
+# --- Backtracking solver ---
+class _SearchLimitReached(Exception):
+    """Dilempar saat jumlah node melewati max_search_nodes."""
 
-    # Task-based latest end (Prioritas: Properti Aktivitas > Batasan Per-Task > Global Default)
-    task_latest_end = (
-        activity.get('latest_end') or 
-        act_constraints.get('latest_end') or 
-        constraints.get('task_latest_end')
-    )
-    if task_latest_end:
-        if end_slot > get_slot_index(task_latest_end):
+def _suffix_duration_counts(activities: List[Dict]) -> List[Dict[int, int]]:
+    """suffix[i] = durasi_slot -> jumlah untuk activities[i:] (untuk skor LCV)."""
+    suffix: List[Dict[int, int]] = [{} for _ in range(len(activities) + 1)]
+    for i in range(len(activities) - 1, -1, -1):
+        counts = dict(suffix[i + 1])
+        length = get_duration_slots(activities[i])
+        counts[length] = counts.get(length, 0) + 1
+        suffix[i] = counts
+    return suffix
+
+def _suffix_zobrist(state: SearchState, activities: List[Dict]) -> List[int]:
+    """suffix[i] = hash Zobrist multiset aktivitas tersisa activities[i:] (salinan ke-k dari signature yang sama = token berbeda)."""
+    suffix = [0] * (len(activities) + 1)
+    copies: Dict[Tuple, int] = {}
+    for i in range(len(activities) - 1, -1, -1):
+        signature = state.signature(activities[i])
+        copies[signature] = copies.get(signature, 0) + 1
+        suffix[i] = suffix[i + 1] ^ state.zobrist_key(('remaining', signature, copies[signature]))
+    return suffix
+
+def _order_candidates(
+    state: SearchState,
+    candidates: List[Tuple[str, int]],
+    duration_slots: int,
+    activity_index: int,
+    constraints: Dict,
+    activity: Optional[Dict] = None,
+) -> List[Tuple[str, int]]:
+    """
+    Urutan nilai (day, start_slot). Default 'lcv': penempatan yang menghilangkan posisi mulai
+    paling sedikit bagi aktivitas tersisa dicoba lebih dulu. balance_daily_load (bobot) menambahkan
+    preferensi lunak untuk hari yang bebannya masih ringan, dan resource_prices menambahkan harga
+    resource bersama yang dipakai activity. soft_preferences menambahkan penalti lunak penempatan
+    (dikali soft_ordering_weight, default 1). Urutan asli menjadi tie-breaker.
+    """
+    ordering = constraints.get('value_ordering', 'lcv')
+    balance_weight = constraints.get('balance_daily_load') or 0
+    if balance_weight is True:
+        balance_weight = 1.0
+    balance_weight = float(balance_weight)
+    priced = bool(activity and state.resource_price_prefix and get_resources(activity))
+    soft_weight = float(constraints.get('soft_ordering_weight', 1.0)) if activity and state.soft_rules else 0.0
+    if ordering != 'lcv' and not balance_weight and not priced and not soft_weight:
+        return candidates
+
+    remaining = state.suffix_durations[activity_index + 1] if ordering == 'lcv' else {}
+
+    def score(candidate):
+        day, start_slot = candidate
+        value = state.eliminated_starts(day, start_slot, duration_slots, remaining) if remaining else 0
+        if balance_weight:
+            value += balance_weight * (state.used_slots[day] + duration_slots)
+        if priced:
+            value += state.resource_cost(day, start_slot, start_slot + duration_slots, activity)
+        if soft_weight:
+            value += soft_weight * state.soft_delta(day, start_slot, duration_slots, activity['name'], activity.get('category'))
+        return value
+
+    return sorted(candidates, key=score)
+
+def _soft_optimize(state: SearchState, constraints: Dict) -> bool:
+    return bool(constraints.get('soft_optimize')) and bool(state.soft_rules)
+
+def _soft_skip_penalty(state: SearchState, constraints: Dict) -> float:
+    """Biaya skip dalam objektif soft_optimize (0 tanpa soft_optimize: skip tidak ikut dioptimasi)."""
+    if not _soft_optimize(state, constraints):
+        return 0.0
+    return float(constraints.get('soft_skip_penalty', DEFAULT_SOFT_SKIP_PENALTY))
+
+def _suffix_soft_bounds(state: SearchState, activities: List[Dict], constraints: Dict) -> List[float]:
+    """suffix[i] = batas bawah penalti lunak activities[i:] (aktivitas terkunci 0, skip dibatasi soft_skip_penalty)."""
+    allow_skip = constraints.get('allow_skip_unplaceable', True)
+    skip_penalty = _soft_skip_penalty(state, constraints)
+    suffix = [0.0] * (len(activities) + 1)
+    for i in range(len(activities) - 1, -1, -1):
+        bound = 0.0
+        if not activities[i].get('is_locked', False):
+            bound = state.soft_lower_bound(activities[i], constraints)
+            if allow_skip:
+                bound = min(bound, skip_penalty)
+        suffix[i] = suffix[i + 1] + bound
+    return suffix
+
+def _improve_soft(
+    state: SearchState,
+    activities: List[Dict],
+    constraints: Dict,
+    activities_indexed_by_name: Dict[str, Dict],
+    placements: List[List[Any]],
+    passes: int,
+) -> int:
+    """
+    Perbaikan lokal untuk solusi heuristik: setiap penempatan ([indeks, hari, slot], diubah di tempat)
+    dipindah ke posisi valid dengan penalti lunak terkecil, diulang sampai tidak ada perbaikan atau passes habis.
+    Pendahulu pada 'after' tidak dipindah karena posisinya menjadi syarat aktivitas lain.
+    Mengembalikan jumlah pemindahan.
+    """
+    anchored = {spec[0] for act in activities for spec in parse_after(act.get('after'))}
+    moves = 0
+    for _ in range(passes):
+        improved = False
+        for placement in placements:
+            index, day, start_slot = placement
+            activity = activities[index]
+            if activity['name'] in anchored:
+                continue
+            name, category = activity['name'], activity.get('category')
+            duration_slots = get_duration_slots(activity)
+            state.unassign(day, start_slot, activity)
+            best_cost = state.soft_delta(day, start_slot, duration_slots, name, category)
+            best = (day, start_slot)
+            for candidate in _collect_candidates(state, activity, constraints, activities_indexed_by_name):
+                cost = state.soft_delta(candidate[0], candidate[1], duration_slots, name, category)
+                if cost < best_cost - 1e-9:
+                    best_cost, best = cost, candidate
+            state.assign(best[0], best[1], activity)
+            if best != (day, start_slot):
+                placement[1], placement[2] = best
+                moves += 1
+                improved = True
+        if not improved:
+            break
+    return moves
+
+def _record_incumbent(
+    state: SearchState,
+    activities: List[Dict],
+    constraints: Dict,
+    activities_indexed_by_name: Dict[str, Dict],
+    stack: List["_Frame"],
+):
+    """
+    Menyimpan solusi lengkap pada stack sebagai incumbent, setelah diperbaiki secara lokal (_improve_soft)
+    agar batas pemangkasan lebih ketat. Perbaikan dibatalkan lagi sehingga state tetap sesuai stack.
+    """
+    placements = [[f.index, f.placed[0], f.placed[1]] for f in stack if f.placed]
+    original = [list(p) for p in placements]
+    passes = int(constraints.get('soft_improve_passes', DEFAULT_SOFT_IMPROVE_PASSES) or 0)
+    moves = _improve_soft(state, activities, constraints, activities_indexed_by_name, placements, passes)
+    state.incumbent = {'cost': state.soft_cost, 'skips': state.stats['skips'], 'placements': placements}
+    state.stats['soft_solutions'] += 1
+    state.stats['soft_moves'] += moves
+    if moves:
+        moved = [(p, o) for p, o in zip(placements, original) if p != o]
+        for (index, day, start_slot), _ in moved:
+            state.unassign(day, start_slot, activities[index])
+        for _, (index, day, start_slot) in moved:
+            state.assign(day, start_slot, activities[index])
+
+class _SearchTimeout(_SearchLimitReached):
+    """Dilempar saat time_limit (detik) terlampaui; checkpoint sudah ditulis jika checkpoint_path diisi."""
+
+class _Frame:
+    """Satu level pencarian: kandidat terurut untuk activities[index], posisi berikutnya, dan penempatan aktif."""
+
+    __slots__ = ('index', 'candidates', 'pos', 'placed', 'key')
+
+    def __init__(self, index: int, candidates: List[Tuple[str, int]], pos: int = 0,
+                 placed: Optional[Tuple[str, int]] = None, key: Optional[int] = None):
+        self.index = index
+        self.candidates = candidates
+        self.pos = pos
+        self.placed = placed
+        self.key = key
+
+class _Checkpointer:
+    """
+    Menulis stack pencarian ke checkpoint_path (JSON, diganti secara atomik) setiap checkpoint_every_nodes node
+    atau checkpoint_every_seconds detik, saat time_limit habis, dan saat Ctrl-C. Checkpoint hanya dipakai ulang
+    jika fingerprint model (aktivitas, jadwal awal, constraints) sama. Incumbent soft_optimize ikut disimpan.
+    """
+
+    def __init__(self, constraints: Dict, fingerprint: str):
+        self.path = constraints.get('checkpoint_path')
+        self.every_nodes = int(constraints.get('checkpoint_every_nodes') or DEFAULT_CHECKPOINT_EVERY_NODES)
+        self.every_seconds = float(constraints.get('checkpoint_every_seconds') or DEFAULT_CHECKPOINT_EVERY_SECONDS)
+        self.fingerprint = fingerprint
+        time_limit = constraints.get('time_limit')
+        self.deadline = time.perf_counter() + float(time_limit) if time_limit else None
+        self.last_nodes = 0
+        self.last_time = time.perf_counter()
+        self.interrupted = False
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return checkpoint if checkpoint.get('fingerprint') == self.fingerprint else None
+
+    def save(self, stack: List[_Frame], state: SearchState):
+        if not self.path:
+            return
+        stats = state.stats
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'fingerprint': self.fingerprint,
+            'stats': {k: v for k, v in stats.items() if isinstance(v, (int, float))},
+            'stack': [[f.index, f.candidates, f.pos, f.placed, f.key] for f in stack],
+            'incumbent': state.incumbent,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.path)
+        self.last_nodes = stats['nodes']
+        self.last_time = time.perf_counter()
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def tick(self, stack: List[_Frame], state: SearchState):
+        """Dipanggil di titik aman (frame teratas belum menempatkan kandidat berikutnya)."""
+        if self.interrupted:
+            self.save(stack, state)
+            raise KeyboardInterrupt
+        if self.deadline is None and not self.path:
+            return
+        nodes = state.stats['nodes']
+        # jam hanya dibaca tiap 64 node agar murah
+        if nodes % 64 and nodes - self.last_nodes < self.every_nodes:
+            return
+        now = time.perf_counter()
+        if self.deadline is not None and now > self.deadline:
+            self.save(stack, state)
+            raise _SearchTimeout()
+        if self.path and (nodes - self.last_nodes >= self.every_nodes or now - self.last_time >= self.every_seconds):
+            self.save(stack, state)
+
+def model_fingerprint(activities: List[Dict], initial_schedule: Dict[str, Dict[int, Any]], constraints: Dict) -> str:
+    """Hash model untuk mencocokkan checkpoint; kunci pengatur checkpoint/waktu tidak ikut dihitung."""
+    payload = {
+        'activities': activities,
+        'initial_schedule': materialize_schedule(initial_schedule),
+        'constraints': {k: v for k, v in constraints.items() if k not in CHECKPOINT_KEYS},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def _collect_candidates(
+    state: SearchState,
+    activity: Dict,
+    constraints: Dict,
+    activities_indexed_by_name: Dict[str, Dict],
+) -> List[Tuple[str, int]]:
+    """Semua (day, start_slot) yang valid untuk activity pada state saat ini, urut hari lalu slot."""
+    duration_slots = get_duration_slots(activity)
+    earliest_slot, latest_end_slot = get_task_window(activity, constraints)
+    latest_start_slot = min(SLOTS_PER_DAY, latest_end_slot) - duration_slots
+
+    candidates: List[Tuple[str, int]] = []
+    for day in DAYS:
+        # Pruning domain: hari yang sudah penuh (jam/hari kerja/unik/kategori) dilewati sekaligus
+        if not state.day_open(day, activity, duration_slots):
+            continue
+
+        # Lompati rentang yang terblokir (fixed/terkunci/terlarang) lewat indeks interval
+        index = state.blocked_index[day]
+        start_slot = index.next_free_start(max(0, earliest_slot), duration_slots)
+        while start_slot is not None and start_slot <= latest_start_slot:
+            if is_valid(state.schedule, day, start_slot, activity, constraints, activities_indexed_by_name, state=state):
+                candidates.append((day, start_slot))
+            start_slot = index.next_free_start(start_slot + 1, duration_slots)
+    return candidates
+
+def _open_frame(
+    state: SearchState,
+    activities: List[Dict],
+    constraints: Dict,
+    activities_indexed_by_name: Dict[str, Dict],
+    activity_index: int,
+) -> Any:
+    """
+    Menyiapkan frame untuk aktivitas berikutnya yang perlu dicari mulai activity_index.
+    Mengembalikan _Frame, True jika semua aktivitas sudah selesai, atau False jika state sudah tercatat gagal.
+    """
+    # Aktivitas yang sudah terkunci di jadwal awal dilewati tanpa mencoba menjadwalkannya
+    while activity_index < len(activities):
+        activity = activities[activity_index]
+        if not (activity.get('is_locked', False) and state.is_placed(activity['name'])):
+            break
+        activity_index += 1
+    else:
+        return True
+
+    stats = state.stats
+    # Transposition table: state yang sama (penempatan + aktivitas tersisa) lewat jalur lain sudah terbukti gagal
+    key = None
+    table = state.transposition
+    if table is not None:
+        key = state.zobrist ^ state.suffix_zobrist[activity_index]
+        stats['tt_probes'] += 1
+        if key in table:
+            table.move_to_end(key)
+            stats['tt_hits'] += 1
             return False
 
-    # Task 'after' constraints: activity must be after listed activities
-    # (Logika ini tetap dipertahankan seperti sebelumnya, memeriksa di hari yang sama)
-    after_list = activity.get('after') or []
-    for prev_name in after_list:
-        found_earlier = False
-        for s, act in schedule[day].items():
-            if isinstance(act, dict) and act.get('name') == prev_name:
-                # Temukan akhir blok aktivitas sebelumnya
-                block_end = s + 1
-                while block_end in schedule[day] and schedule[day][block_end].get('name') == prev_name:
-                    block_end += 1
-                
-                # Memastikan blok sebelumnya berakhir sebelum aktivitas ini dimulai
-                if block_end <= start_slot:
-                    found_earlier = True
-                    break
-        
-        # Jika prev_name ada dalam daftar aktivitas, tapi tidak ditemukan lebih awal hari ini,
-        # maka batasan 'after' dilanggar.
-        if prev_name in activities_indexed_by_name and not found_earlier:
+    candidates = _collect_candidates(state, activity, constraints, activities_indexed_by_name)
+    candidates = _order_candidates(state, candidates, get_duration_slots(activity), activity_index, constraints, activity)
+    return _Frame(activity_index, candidates, key=key)
+
+def _search(
+    state: SearchState,
+    activities: List[Dict],
+    constraints: Dict,
+    activities_indexed_by_name: Dict[str, Dict],
+    stack: List[_Frame],
+    checkpointer: _Checkpointer,
+    start_index: Optional[int] = None,
+) -> bool:
+    """
+    Backtracking iteratif dengan stack eksplisit (tanpa rekursi per aktivitas/skip), in-place:
+    assign -> turun satu level -> unassign saat level bawah gagal. Jika start_index None,
+    pencarian dilanjutkan dari stack yang sudah ada (resume dari checkpoint).
+    Dengan soft_optimize, setiap solusi lengkap disimpan sebagai incumbent lalu pencarian berlanjut
+    (branch-and-bound): cabang dipangkas jika penalti saat ini + batas bawah sisa >= incumbent.
+    """
+    allow_skip = constraints.get('allow_skip_unplaceable', True)
+    max_nodes = constraints.get('max_search_nodes')
+    max_nodes = int(max_nodes) if max_nodes is not None else None
+    optimize = _soft_optimize(state, constraints)
+    skip_penalty = _soft_skip_penalty(state, constraints)
+    stats = state.stats
+
+    def descend(activity_index: int) -> Optional[bool]:
+        if optimize and state.incumbent is not None and \
+                state.soft_cost + state.soft_bounds[activity_index] >= state.incumbent['cost']:
+            stats['soft_pruned'] += 1
             return False
+        outcome = _open_frame(state, activities, constraints, activities_indexed_by_name, activity_index)
+        if isinstance(outcome, _Frame):
+            stack.append(outcome)
+            return None
+        if outcome is True and optimize:
+            # Lolos pemangkasan berarti lebih baik dari incumbent; cari terus solusi yang lebih murah
+            _record_incumbent(state, activities, constraints, activities_indexed_by_name, stack)
+            return False
+        return outcome
 
-    return True
+    result = descend(start_index) if start_index is not None else None
+    while True:
+        if result is True:
+            return True
+        if not stack:
+            return bool(result) if result is not None else True
+        frame = stack[-1]
+        if result is False:
+            if frame.placed is None:
+                # level bawah gagal setelah skip (hanya terjadi saat soft_optimize): batalkan skip
+                state.soft_cost -= skip_penalty
+                stats['skips'] -= 1
+            else:
+                # level bawah gagal: batalkan kandidat frame ini
+                day, start_slot = frame.placed
+                state.unassign(day, start_slot, activities[frame.index])
+                frame.placed = None
+                stats['backtracks'] += 1
+        result = None
+
+        activity = activities[frame.index]
+        while frame.pos < len(frame.candidates):
+            checkpointer.tick(stack, state)
+            day, start_slot = frame.candidates[frame.pos]
+            frame.pos += 1
+            stats['nodes'] += 1
+            if max_nodes is not None and stats['nodes'] > max_nodes:
+                raise _SearchLimitReached()
+            state.assign(day, start_slot, activity)
+            frame.placed = (day, start_slot)
+
+            # Forward check: tanpa skip, setiap aktivitas tersisa harus masih punya hari terbuka
+            if allow_skip or all(state.has_open_day(a) for a in activities[frame.index + 1:]):
+                result = descend(frame.index + 1)
+                break
+            state.unassign(day, start_slot, activity)
+            frame.placed = None
+            stats['backtracks'] += 1
+        else:
+            if allow_skip and frame.pos == len(frame.candidates):
+                # Aktivitas ini tidak bisa ditempatkan: lewati. Frame tetap di stack dengan pos melewati
+                # kandidat terakhir (penanda skip), sehingga skip bisa dibatalkan dan diputar ulang dari checkpoint
+                frame.pos += 1
+                stats['skips'] += 1
+                state.soft_cost += skip_penalty
+                result = descend(frame.index + 1)
+            else:
+                stack.pop()
+                # Hanya state yang benar-benar gagal disimpan (pencarian yang terpotong keluar lewat exception).
+                # Dengan soft_optimize "gagal" berarti tidak ada yang lebih murah dari incumbent; tetap sah
+                # karena incumbent hanya bisa turun.
+                table = state.transposition
+                if table is not None:
+                    table[frame.key] = True
+                    stats['tt_stores'] += 1
+                    if len(table) > state.transposition_size:
+                        table.popitem(last=False)
+                result = False
 
-# --- Backtracking solver (Tidak Diubah) ---
 def csp_backtracking(
     activities: List[Dict],
     initial_schedule: Dict[str, Dict[int, Any]],
     constraints: Dict,
     activities_indexed_by_name: Dict[str, Dict],
     activity_index: int = 0,
+    stats: Optional[Dict[str, Any]] = None,
 ) -> Tuple[Dict[str, Dict[int, Any]], bool]:
-    """Logika backtracking inti (menggunakan is_valid yang baru direfaktor)"""
-    # shallow copy schedule map
-    current_schedule = {d: s.copy() for d, s in initial_schedule.items()}
-
-    # base case
-    if activity_index >= len(activities):
-        return current_schedule, True
-
-    activity = activities[activity_index]
-    duration_slots = max(1, int(activity['duration'] * 60) // SLOT_DURATION)
+    """
+    Logika backtracking inti (menggunakan is_valid dan counter inkremental SearchState).
+    Jika stats diberikan, diisi dengan nodes, backtracks, skips, aborted (batas max_search_nodes/time_limit),
+    timed_out, resumed, dan statistik transposition table: tt_probes, tt_hits, tt_stores, tt_hit_rate.
+    Dengan checkpoint_path, pencarian yang terputus (time_limit, Ctrl-C, crash) dilanjutkan dari checkpoint.
 
-    # Cek apakah aktivitas ini sudah ditempatkan di jadwal awal (misalnya dari generated_schedule yang dikunci)
-    is_already_placed = False
-    for day in DAYS:
-        for slot, act in current_schedule[day].items():
-            if isinstance(act, dict) and act.get('name') == activity['name']:
-                is_already_placed = True
-                break
-        if is_already_placed:
-            break
-            
-    if is_already_placed and activity.get('is_locked', False):
-         # Jika aktivitas sudah terkunci di jadwal awal, lanjutkan ke aktivitas berikutnya tanpa mencoba menjadwalkannya
-        return csp_backtracking(activities, current_schedule, constraints, activities_indexed_by_name, activity_index + 1)
+    Dengan soft_preferences, stats juga berisi soft_cost (penalti lunak jadwal hasil). soft_optimize=True
+    menjalankan branch-and-bound sampai optimal (soft_optimal) atau sampai batas node/waktu, lalu mengembalikan
+    incumbent terbaik; tanpa soft_optimize, solusi pertama diperbaiki secara lokal (soft_improve_passes).
+    """
+    # shallow copy schedule map; pencarian mengubah salinan ini secara in-place
+    state = SearchState({d: s.copy() for d, s in initial_schedule.items()}, constraints)
+    state.suffix_durations = _suffix_duration_counts(activities)
+    # Transposition table hanya berguna saat skip dimatikan: dengan skip, pencarian tidak pernah gagal
+    state.transposition_size = int(constraints.get('transposition_table_size', DEFAULT_TRANSPOSITION_TABLE_SIZE) or 0)
+    if state.transposition_size > 0 and not constraints.get('allow_skip_unplaceable', True):
+        state.transposition = OrderedDict()
+        state.suffix_zobrist = _suffix_zobrist(state, activities)
+    optimize = _soft_optimize(state, constraints)
+    if optimize:
+        state.soft_bounds = _suffix_soft_bounds(state, activities, constraints)
 
+    fingerprint = model_fingerprint(activities, initial_schedule, constraints) if constraints.get('checkpoint_path') else ""
+    checkpointer = _Checkpointer(constraints, fingerprint)
+    stack: List[_Frame] = []
+    start_index: Optional[int] = activity_index
+    checkpoint = checkpointer.load()
+    if checkpoint is not None:
+        # Bangun ulang state dengan memutar ulang penempatan aktif (dan skip) di setiap frame
+        skip_penalty = _soft_skip_penalty(state, constraints)
+        for index, candidates, pos, placed, key in checkpoint['stack']:
+            frame = _Frame(index, [tuple(c) for c in candidates], pos, tuple(placed) if placed else None, key)
+            if frame.placed:
+                state.assign(frame.placed[0], frame.placed[1], activities[index])
+            elif frame.pos > len(frame.candidates):
+                state.soft_cost += skip_penalty
+            stack.append(frame)
+        state.stats.update(checkpoint.get('stats', {}))
+        state.incumbent = checkpoint.get('incumbent')
+        start_index = None
+    state.stats['resumed'] = checkpoint is not None
 
-    # Coba setiap hari dan setiap slot mulai
-    for day in DAYS:
-        # Cek apakah hari ini adalah hari bebas wajib (untuk efisiensi)
-        if constraints.get('global_mandatory_day_off') == day and not activity.get('is_fixed'):
-            continue # Langsung lewati hari ini
-
-        for start_slot in range(0, SLOTS_PER_DAY - duration_slots + 1):
-            if is_valid(current_schedule, day, start_slot, activity, constraints, activities_indexed_by_name):
-                # assign
-                new_schedule = {d: s.copy() for d, s in current_schedule.items()}
-                for s in range(start_slot, start_slot + duration_slots):
-                    new_schedule[day][s] = {
-                        'name': activity['name'],
-                        'priority': activity.get('priority', 0),
-                        'duration_slots': duration_slots,
-                        'category': activity.get('category'),
-                        'is_first_slot': s == start_slot,
-                    }
-                
-                # recursion
-                result_schedule, success = csp_backtracking(
-                    activities, new_schedule, constraints, activities_indexed_by_name, activity_index + 1
-                )
-                if success:
-                    return result_schedule, True
-                # otherwise continue searching
-
-    # Jika tidak bisa menempatkan aktivitas ini, lewati jika diizinkan
-    if constraints.get('allow_skip_unplaceable', True):
-        # Coba melewati aktivitas ini dan lanjutkan
-        return csp_backtracking(
-            activities, current_schedule, constraints, activities_indexed_by_name, activity_index + 1
-        )
+    # Ctrl-C hanya menandai; checkpoint ditulis di titik aman berikutnya
+    previous_handler = None
+    if checkpointer.path and threading.current_thread() is threading.main_thread():
+        def on_interrupt(signum, frame):
+            checkpointer.interrupted = True
+        previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+    try:
+        success = _search(state, activities, constraints, activities_indexed_by_name, stack, checkpointer, start_index)
+        state.stats['aborted'] = False
+        state.stats['timed_out'] = False
+        checkpointer.clear()
+    except _SearchLimitReached as e:
+        success = False
+        state.stats['aborted'] = True
+        state.stats['timed_out'] = isinstance(e, _SearchTimeout)
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
 
-    return current_schedule, False
+    if optimize:
+        state.stats['soft_optimal'] = not state.stats['aborted'] and state.incumbent is not None
+        if state.incumbent is not None:
+            # Jadwal hasil = incumbent terbaik (juga saat batas node/waktu habis: solusi anytime)
+            best = state.incumbent
+            stats_so_far = state.stats
+            state = SearchState({d: s.copy() for d, s in initial_schedule.items()}, constraints)
+            for index, day, start_slot in best['placements']:
+                state.assign(day, start_slot, activities[index])
+            state.stats = stats_so_far
+            state.stats['skips'] = best['skips']
+            success = True
+    elif success and state.soft_rules:
+        passes = int(constraints.get('soft_improve_passes', DEFAULT_SOFT_IMPROVE_PASSES) or 0)
+        placements = [[f.index, f.placed[0], f.placed[1]] for f in stack if f.placed]
+        state.stats['soft_moves'] = _improve_soft(state, activities, constraints, activities_indexed_by_name, placements, passes)
+    if state.soft_rules:
+        state.stats['soft_cost'] = state.soft_cost
+    probes = state.stats['tt_probes']
+    state.stats['tt_hit_rate'] = state.stats['tt_hits'] / probes if probes else 0.0
+    if stats is not None:
+        stats.update(state.stats)
+    return state.schedule, success
 
 # --- Main solve function (Sedikit Diubah untuk Memasukkan is_fixed) ---
-def solve_csp(data: Dict[str, Any], constraints: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+class CompiledModel(NamedTuple):
     """
-    Fungsi utama. Mengembalikan (final_schedule, status) di mana final_schedule adalah dict: day -> {slot_str: act_dict}.
+    Model yang siap dicari: jadwal awal (fixed + terkunci) dan daftar aktivitas terurut.
+    Dapat disimpan dan dipakai ulang (mis. oleh daemon) selama data dan constraints tidak berubah.
     """
-    if 'activities' not in data:
-        return {}, 'NO_ACTIVITIES'
+    constraints: Dict[str, Any]
+    initial_schedule: Dict[str, Dict[int, Any]]
+    activities: List[Dict]
+    activities_indexed_by_name: Dict[str, Dict]
+    generated_schedule: Dict[str, Dict[str, Dict]]
 
+def compile_model(data: Dict[str, Any], constraints: Dict[str, Any]) -> CompiledModel:
+    """
+    Membangun CompiledModel dari data (fixed_schedule, activities, generated_schedule) dan constraints.
+    Seperti sebelumnya, data['generated_schedule'] dinormalisasi di tempat.
+    """
     # Normalisasi generated_schedule
     data['generated_schedule'] = normalize_generated_schedule(data.get('generated_schedule'))
 
     # Build initial schedule and index activities by name
     initial_schedule: Dict[str, Dict[int, Any]] = {day: {} for day in DAYS}
 
-    # 1. Masukkan Jadwal Tetap (Fixed Schedule)
+    # 1. Masukkan Jadwal Tetap (Fixed Schedule): satu Placement per entri, dibagikan ke semua slotnya
     for fixed_act in data.get('fixed_schedule', []) or []:
         day = fixed_act.get('day')
         if day not in initial_schedule: continue
@@ -334,30 +1399,29 @@ def solve_csp(data: Dict[str, Any], constraints: Dict[str, Any]) -> Tuple[Dict[s
         
         start_slot = max(0, start_slot)
         end_slot = min(SLOTS_PER_DAY, end_slot)
+        if end_slot <= start_slot: continue
 
-        for s in range(start_slot, end_slot):
-            initial_schedule[day][s] = {
-                'name': fixed_act.get('name', 'FIXED'),
-                'is_fixed': True,
-                'category': fixed_act.get('category'),
-                'is_first_slot': s == start_slot,
-            }
+        place(initial_schedule[day], Placement(
+            fixed_act.get('name', 'FIXED'), day, start_slot, end_slot - start_slot,
+            category=fixed_act.get('category'), is_fixed=True,
+        ))
 
-    # 2. Masukkan Slot Generated yang Dikunci (Locked Generated Slots)
+    # 2. Masukkan Slot Generated yang Dikunci (Locked Generated Slots), digabung per blok
     for day, slots in (data.get('generated_schedule') or {}).items():
         if day not in initial_schedule: continue
         if not isinstance(slots, dict): continue
 
-        for slot_str, act in slots.items():
-            try:
-                slot_int = int(slot_str)
-            except Exception:
-                continue
-
-            if act and isinstance(act, dict) and act.get('is_locked'):
-                # Pastikan slot yang dikunci tidak menimpa fixed
-                if slot_int not in initial_schedule[day]:
-                    initial_schedule[day][slot_int] = {**act, 'is_locked': True} # Tambahkan is_locked untuk consistency
+        locked_slots = {
+            int(slot_str): act for slot_str, act in slots.items()
+            if act and isinstance(act, dict) and act.get('is_locked') and str(slot_str).lstrip('-').isdigit()
+        }
+        for p in iter_day_placements(locked_slots):
+            # Pastikan slot yang dikunci tidak menimpa fixed; dict tiap slot disimpan apa adanya untuk output
+            place(initial_schedule[day], Placement(
+                p['name'], day, p['start_slot'], p['end_slot'] - p['start_slot'],
+                p['priority'], p['category'], p['is_fixed'], True,
+                tuple(locked_slots[s] for s in range(p['start_slot'], p['end_slot'])),
+            ), overwrite=False)
 
     # Activities list and index
     activities_all: List[Dict] = data.get('activities', [])
@@ -366,9 +1430,9 @@ def solve_csp(data: Dict[str, Any], constraints: Dict[str, Any]) -> Tuple[Dict[s
     # Hapus aktivitas yang sudah terkunci dari daftar activities_to_schedule
     locked_activity_names = set()
     for day in DAYS:
-        for slot, act in initial_schedule[day].items():
-            if act and act.get('is_locked') and not act.get('is_fixed'):
-                locked_activity_names.add(act.get('name'))
+        for p in get_day_placements(day, initial_schedule[day]):
+            if p.is_locked and not p.is_fixed:
+                locked_activity_names.add(p.name)
 
     activities_to_be_scheduled = [
         act for act in activities_all if act['name'] not in locked_activity_names
@@ -394,30 +1458,54 @@ def solve_csp(data: Dict[str, Any], constraints: Dict[str, Any]) -> Tuple[Dict[s
     # Namun, karena logika csp_backtracking sudah mengabaikan yang terkunci, kita biarkan saja listnya
     # hanya berisi yang harus dijadwalkan.
 
+    return CompiledModel(
+        constraints, initial_schedule, activities_to_schedule, activities_indexed_by_name, data['generated_schedule'],
+    )
+
+def solve_model(model: CompiledModel, stats: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    Menjalankan backtracking pada CompiledModel. Mengembalikan (final_schedule, status) seperti solve_csp;
+    status 'TIMEOUT' jika time_limit habis sebelum pencarian selesai.
+    """
+    initial_schedule = model.initial_schedule
+
     # Panggil backtracking
+    if stats is None:
+        stats = {}
     final_schedule, success = csp_backtracking(
-        activities_to_schedule, 
+        model.activities, 
         initial_schedule, 
-        constraints, 
-        activities_indexed_by_name
+        model.constraints, 
+        model.activities_indexed_by_name,
+        stats=stats,
     )
 
-    # Konversi kunci slot ke str untuk output
-    output = {day: {str(slot): act for slot, act in final_schedule[day].items()} for day in DAYS}
+    # Konversi kunci slot ke str dan Placement ke dict per-slot untuk output
+    output = materialize_schedule(final_schedule)
     
     if success:
         # Gabungkan dengan struktur generated_schedule asli untuk entri non-locked
-        data['generated_schedule'] = data.get('generated_schedule') or {day: {} for day in DAYS}
+        generated_schedule = model.generated_schedule or {day: {} for day in DAYS}
         for day in DAYS:
-            merged = {**data['generated_schedule'].get(day, {})}
+            merged = {**generated_schedule.get(day, {})}
             for slot, act in output[day].items():
                 merged[str(slot)] = act
             output[day] = merged
         return output, 'SUCCESS'
     else:
-        # Kembalikan initial_schedule jika gagal
-        output_fail = {day: {str(slot): act for slot, act in initial_schedule[day].items()} for day in DAYS}
-        return output_fail, 'FAILURE'
+        # Kembalikan initial_schedule jika gagal; TIMEOUT berarti bisa dilanjutkan dari checkpoint
+        output_fail = materialize_schedule(initial_schedule)
+        return output_fail, 'TIMEOUT' if stats.get('timed_out') else 'FAILURE'
+
+def solve_csp(data: Dict[str, Any], constraints: Dict[str, Any], stats: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    Fungsi utama. Mengembalikan (final_schedule, status) di mana final_schedule adalah dict: day -> {slot_str: act_dict}.
+    Statistik pencarian ditulis ke stats jika diberikan (lihat csp_backtracking).
+    """
+    if 'activities' not in data:
+        return {}, 'NO_ACTIVITIES'
+
+    return solve_model(compile_model(data, constraints), stats)
 
 # --- Export (Updated for consistency) ---
 CONSTANTS = {
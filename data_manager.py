@@ -4,10 +4,10 @@ from rich.console import Console
 FILE_PATH = "data.json"
 console = Console()
 
-def load_data():
+def load_data(file_path=FILE_PATH):
     """Memuat data jadwal dari file JSON."""
     try:
-        with open(FILE_PATH, 'r') as f:
+        with open(file_path, 'r') as f:
             data = json.load(f)
             # Pastikan kunci utama ada
             if "fixed_schedule" not in data:
@@ -24,17 +24,17 @@ def load_data():
             "generated_schedule": []
         }
     except json.JSONDecodeError:
-        console.print("[bold red]ERROR:[/bold red] File data.json rusak. Memuat data kosong.")
+        console.print(f"[bold red]ERROR:[/bold red] File {file_path} rusak. Memuat data kosong.")
         return {
             "fixed_schedule": [],
             "activities": [],
             "generated_schedule": []
         }
 
-def save_data(data):
+def save_data(data, file_path=FILE_PATH):
     """Menyimpan data jadwal ke file JSON."""
     try:
-        with open(FILE_PATH, 'w') as f:
+        with open(file_path, 'w') as f:
             json.dump(data, f, indent=4)
     except Exception as e:
         console.print(f"[bold red]ERROR:[/bold red] Gagal menyimpan data: {e}")
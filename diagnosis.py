@@ -0,0 +1,278 @@
+import time
+from typing import List, Dict, Tuple, Any, Optional, NamedTuple, FrozenSet
+
+from csp_solver import (
+    DAYS, SLOTS_PER_DAY, CHECKPOINT_KEYS, CompiledModel, SearchState, compile_model, csp_backtracking,
+    get_duration_slots, get_task_window, is_valid,
+)
+
+# Diagnosis jadwal yang tidak feasible: mencari himpunan konflik minimal (constraint + aktivitas)
+# dengan QuickXplain (Junker, 2004) di atas CompiledModel. Setiap cek konsistensi adalah
+# sub-solve pendek tanpa skip dan dengan batas node, sehingga total waktu diagnosis
+# tetap kelipatan kecil dari satu kali solve.
+
+DEFAULT_NODE_BUDGET = 2000
+
+# Kunci global yang boleh direlaksasi; kunci lain (value_ordering, max_tasks, dll) selalu dipakai
+GLOBAL_LABELS = {
+    'global_max_hours_per_day': "maks {value} jam/hari",
+    'global_min_gap': "jeda min {value} menit",
+    'global_max_unique_activities_per_day': "maks {value} aktivitas unik/hari",
+    'global_max_tasks_per_day': "maks {value} tugas/hari",
+    'global_max_low_priority_per_day': "maks {value} prioritas rendah/hari",
+    'global_max_work_days': "maks {value} hari kerja",
+    'global_mandatory_day_off': "libur wajib {value}",
+    'task_earliest_start': "mulai ≥ {value}",
+    'task_latest_end': "selesai ≤ {value}",
+}
+TASK_LABELS = {
+    'earliest_start': "{name} mulai ≥ {value}",
+    'latest_end': "{name} selesai ≤ {value}",
+}
+
+class ConflictItem(NamedTuple):
+    """Satu unsur yang bisa direlaksasi: constraint, satu instance aktivitas, atau batasan 'after' aktivitas."""
+    kind: str   # 'global' | 'forbidden' | 'category' | 'task' | 'activity' | 'after'
+    key: Any    # harus hashable (item dipakai sebagai kunci memo)
+    value: Any
+    label: str
+
+# --- 1. Dekomposisi model ---
+
+def _fmt(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+def conflict_items(model: CompiledModel) -> Tuple[List[ConflictItem], Dict[str, Any]]:
+    """
+    Memecah constraints dan aktivitas model menjadi daftar ConflictItem.
+    Mengembalikan (items, base_constraints) di mana base_constraints berisi kunci yang tidak direlaksasi.
+    """
+    constraints = model.constraints or {}
+    activity_names = {act['name'] for act in model.activities}
+    items: List[ConflictItem] = []
+    base: Dict[str, Any] = {}
+
+    for key, value in constraints.items():
+        if value is None:
+            continue
+        if key in GLOBAL_LABELS:
+            items.append(ConflictItem('global', key, value, GLOBAL_LABELS[key].format(value=_fmt(value))))
+        elif key == 'global_no_activity_blocks':
+            for start_time, end_time in value or []:
+                items.append(ConflictItem('forbidden', key, (start_time, end_time), f"terlarang {start_time}–{end_time}"))
+        elif key == 'global_max_hours_per_category_per_day':
+            for category, hours in (value or {}).items():
+                items.append(ConflictItem('category', category, hours, f"maks {_fmt(hours)} jam {category}/hari"))
+        elif key in activity_names and isinstance(value, dict):
+            for task_key, task_value in value.items():
+                label = TASK_LABELS.get(task_key, "{name} " + task_key + "={value}")
+                items.append(ConflictItem('task', (key, task_key), task_value, label.format(name=key, value=task_value)))
+        else:
+            base[key] = value
+
+    seen_after = set()
+    for position, act in enumerate(model.activities):
+        items.append(ConflictItem('activity', position, act['name'], act['name']))
+        if act.get('after') and act['name'] not in seen_after:
+            seen_after.add(act['name'])
+            predecessors = ", ".join(
+                spec if isinstance(spec, str) else str(spec.get('name'))
+                for spec in (act['after'] if isinstance(act['after'], list) else [act['after']])
+            )
+            items.append(ConflictItem('after', act['name'], predecessors, f"{act['name']} setelah {predecessors}"))
+    return items, base
+
+def _sub_problem(model: CompiledModel, base: Dict[str, Any], items: List[ConflictItem],
+                 node_budget: int) -> Tuple[List[Dict], Dict[str, Any], Dict[str, Dict]]:
+    """Aktivitas, constraints, dan indeks nama untuk sub-solve yang hanya memakai items."""
+    # Checkpoint dan batas waktu milik solve pengguna tidak berlaku untuk sub-solve (batasnya node_budget)
+    constraints = {key: value for key, value in base.items() if key not in CHECKPOINT_KEYS}
+    constraints['allow_skip_unplaceable'] = False
+    constraints['max_search_nodes'] = node_budget
+    constraints['soft_optimize'] = False  # cek konsistensi cukup satu solusi, bukan yang optimal
+    positions = set()
+    after_names = set()
+    for item in items:
+        if item.kind == 'global':
+            constraints[item.key] = item.value
+        elif item.kind == 'forbidden':
+            constraints.setdefault(item.key, []).append(list(item.value))
+        elif item.kind == 'category':
+            constraints.setdefault('global_max_hours_per_category_per_day', {})[item.key] = item.value
+        elif item.kind == 'task':
+            name, task_key = item.key
+            constraints.setdefault(name, {})[task_key] = item.value
+        elif item.kind == 'activity':
+            positions.add(item.key)
+        elif item.kind == 'after':
+            after_names.add(item.key)
+
+    # Urutan aktivitas model (prioritas) dipertahankan; 'after' yang tidak dipilih dilepas dari salinan
+    activities = []
+    for position, act in enumerate(model.activities):
+        if position not in positions:
+            continue
+        if act.get('after') and act['name'] not in after_names:
+            act = {k: v for k, v in act.items() if k != 'after'}
+        activities.append(act)
+
+    # Pendahulu yang tidak ikut sub-solve tidak lagi wajib ada (lihat precedence_violation)
+    # Indeks memakai salinan sub-solve, sehingga cek balik 'after' juga mengikuti 'after' yang dilepas
+    included = {act['name']: act for act in activities}
+    schedulable = {act['name'] for act in model.activities}
+    index = {
+        name: included.get(name, act) for name, act in model.activities_indexed_by_name.items()
+        if name in included or name not in schedulable
+    }
+    return activities, constraints, index
+
+def _has_start(state: SearchState, activity: Dict, index: Dict[str, Dict], constraints: Dict[str, Any]) -> bool:
+    """Apakah activity punya minimal satu posisi valid pada jadwal awal (sama seperti pengumpulan kandidat _backtrack)."""
+    duration_slots = get_duration_slots(activity)
+    earliest_slot, latest_end_slot = get_task_window(activity, constraints)
+    latest_start_slot = min(SLOTS_PER_DAY, latest_end_slot) - duration_slots
+    for day in DAYS:
+        if not state.day_open(day, activity, duration_slots):
+            continue
+        blocked = state.blocked_index[day]
+        start_slot = blocked.next_free_start(max(0, earliest_slot), duration_slots)
+        while start_slot is not None and start_slot <= latest_start_slot:
+            if is_valid(state.schedule, day, start_slot, activity, constraints, index, state=state):
+                return True
+            start_slot = blocked.next_free_start(start_slot + 1, duration_slots)
+    return False
+
+def bound_infeasible(model: CompiledModel, activities: List[Dict], constraints: Dict[str, Any],
+                     index: Dict[str, Dict]) -> bool:
+    """
+    Relaksasi murah yang membuktikan infeasible tanpa pencarian: (1) ada aktivitas tanpa posisi valid
+    sama sekali pada jadwal awal, atau (2) total durasi melebihi kapasitas slot bebas pada hari kerja
+    terbaik (jam per hari, hari libur wajib, dan maks hari kerja ikut dihitung). False berarti belum terbukti.
+    """
+    if not activities:
+        return False
+    state = SearchState({day: slots.copy() for day, slots in model.initial_schedule.items()}, constraints)
+
+    window_start, window_end = SLOTS_PER_DAY, 0
+    demand = 0
+    for act in activities:
+        earliest_slot, latest_end_slot = get_task_window(act, constraints)
+        window_start = min(window_start, max(0, earliest_slot))
+        window_end = max(window_end, min(SLOTS_PER_DAY, latest_end_slot))
+        demand += get_duration_slots(act)
+        # posisi aktivitas dengan 'after' bergantung pada pendahulu, jadi tidak dicek di jadwal awal
+        if not act.get('after') and not _has_start(state, act, index, constraints):
+            return True
+
+    worked, unworked = [], []
+    for day in DAYS:
+        if day == state.mandatory_day_off:
+            continue
+        capacity = sum(
+            max(0, min(end, window_end) - max(start, window_start))
+            for start, end in state.blocked_index[day].free_intervals()
+        )
+        if state.max_slots_per_day is not None:
+            capacity = min(capacity, state.max_slots_per_day - state.used_slots[day])
+        (worked if state.used_slots[day] else unworked).append(max(0, capacity))
+    if state.max_work_days is not None:
+        unworked = sorted(unworked, reverse=True)[:max(0, state.max_work_days - state.work_days)]
+    return demand > sum(worked) + sum(unworked)
+
+# --- 2. QuickXplain ---
+
+class _Checker:
+    """Cek konsistensi dengan memo per himpunan item dan batas waktu total."""
+
+    def __init__(self, model: CompiledModel, base: Dict[str, Any], node_budget: int, deadline: Optional[float]):
+        self.model = model
+        self.base = base
+        self.node_budget = node_budget
+        self.deadline = deadline
+        self.memo: Dict[FrozenSet[ConflictItem], bool] = {}
+        self.stats = {'checks': 0, 'bound_proofs': 0, 'aborted_checks': 0, 'nodes': 0, 'timed_out': False}
+
+    def consistent(self, items: List[ConflictItem]) -> bool:
+        """
+        True jika sub-masalah feasible. Sub-solve yang terpotong batas node/waktu dianggap konsisten,
+        sehingga item hanya dibuang dari konflik jika inkonsistensinya terbukti.
+        """
+        key = frozenset(items)
+        if key in self.memo:
+            return self.memo[key]
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.stats['timed_out'] = True
+            return True
+
+        activities, constraints, index = _sub_problem(self.model, self.base, items, self.node_budget)
+        if bound_infeasible(self.model, activities, constraints, index):
+            self.stats['bound_proofs'] += 1
+            self.memo[key] = False
+            return False
+
+        stats: Dict[str, Any] = {}
+        _, success = csp_backtracking(activities, self.model.initial_schedule, constraints, index, stats=stats)
+        self.stats['checks'] += 1
+        self.stats['nodes'] += stats.get('nodes', 0)
+        if stats.get('aborted'):
+            self.stats['aborted_checks'] += 1
+            success = True
+        self.memo[key] = success
+        return success
+
+def _quickxplain(checker: _Checker, background: List[ConflictItem], delta: List[ConflictItem],
+                 candidates: List[ConflictItem]) -> List[ConflictItem]:
+    if delta and not checker.consistent(background):
+        return []
+    if len(candidates) == 1:
+        return list(candidates)
+    middle = len(candidates) // 2
+    first, second = candidates[:middle], candidates[middle:]
+    delta2 = _quickxplain(checker, background + first, first, second)
+    delta1 = _quickxplain(checker, background + delta2, delta2, first)
+    return delta1 + delta2
+
+# --- 3. API ---
+
+def format_conflict(items: List[ConflictItem]) -> str:
+    """Ringkasan konflik, misalnya 'Freelance ×2 + maks 4 jam Belajar/hari + terlarang 18:00–20:00'."""
+    parts: List[str] = []
+    activity_counts: Dict[str, int] = {}
+    for item in items:
+        if item.kind == 'activity':
+            activity_counts[item.value] = activity_counts.get(item.value, 0) + 1
+    for name, count in activity_counts.items():
+        parts.append(f"{name} ×{count}" if count > 1 else name)
+    parts.extend(item.label for item in items if item.kind != 'activity')
+    return " + ".join(parts)
+
+def diagnose_model(model: CompiledModel, node_budget: int = DEFAULT_NODE_BUDGET,
+                   time_limit: Optional[float] = None, known_infeasible: bool = False) -> Dict[str, Any]:
+    """
+    Mencari himpunan konflik minimal pada model (jadwal fixed/terkunci selalu dianggap tetap).
+    known_infeasible=True melewati cek awal seluruh model (misalnya setelah solve_csp gagal tanpa terpotong).
+    Hasil: status ('CONFLICT' | 'NO_CONFLICT' | 'UNKNOWN'), conflict (list ConflictItem), message,
+    minimal (False jika ada cek yang terpotong), checks, bound_proofs, aborted_checks, nodes, seconds.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit if time_limit else None
+    items, base = conflict_items(model)
+    checker = _Checker(model, base, node_budget, deadline)
+
+    result: Dict[str, Any] = {'status': 'NO_CONFLICT', 'conflict': [], 'message': "", 'minimal': True}
+    if not known_infeasible and checker.consistent(items):
+        result['status'] = 'UNKNOWN' if checker.stats['aborted_checks'] else 'NO_CONFLICT'
+    elif items:
+        conflict = _quickxplain(checker, [], [], items)
+        result['status'] = 'CONFLICT'
+        result['conflict'] = conflict
+        result['message'] = format_conflict(conflict)
+        result['minimal'] = not (checker.stats['aborted_checks'] or checker.stats['timed_out'])
+
+    result.update(checker.stats)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def diagnose(data: Dict[str, Any], constraints: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """Diagnosis langsung dari data + constraints (lihat diagnose_model)."""
+    return diagnose_model(compile_model(data, constraints), **kwargs)
@@ -0,0 +1,72 @@
+from typing import List, Dict, Tuple, Iterable, Optional
+from bisect import bisect_left, bisect_right
+
+class IntervalIndex:
+    """
+    Interval slot terblokir [start, end) untuk satu hari, digabung dan terurut.
+    Dipakai solver untuk jadwal fixed/terkunci dan blok waktu terlarang yang tidak berubah
+    selama pencarian: cek tumpang tindih dan pencarian slot mulai berikutnya masing-masing O(log n).
+    """
+
+    __slots__ = ('starts', 'ends', 'limit', '_free_cache')
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]], limit: int):
+        self.limit = limit
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted((max(0, s), min(limit, e)) for s, e in intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        # durasi -> (batas bawah, batas atas) rentang slot mulai yang bebas, dibangun saat dibutuhkan
+        self._free_cache: Dict[int, Tuple[List[int], List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Apakah [start, end) bersinggungan dengan interval terblokir."""
+        i = bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def _free_starts(self, length: int) -> Tuple[List[int], List[int]]:
+        cached = self._free_cache.get(length)
+        if cached is not None:
+            return cached
+
+        lows: List[int] = []
+        highs: List[int] = []
+        prev_end = 0
+        for start, end in zip(self.starts + [self.limit], self.ends + [self.limit]):
+            # celah bebas [prev_end, start) menampung slot mulai prev_end .. start - length
+            if start - prev_end >= length:
+                lows.append(prev_end)
+                highs.append(start - length)
+            prev_end = max(prev_end, end)
+        self._free_cache[length] = (lows, highs)
+        return lows, highs
+
+    def next_free_start(self, slot: int, length: int) -> Optional[int]:
+        """
+        Slot mulai terkecil >= slot sehingga [mulai, mulai + length) tidak menyentuh interval terblokir
+        dan masih di dalam hari. None jika tidak ada.
+        """
+        lows, highs = self._free_starts(length)
+        j = bisect_left(highs, slot)
+        if j >= len(highs):
+            return None
+        return max(slot, lows[j])
+
+    def free_intervals(self) -> List[Tuple[int, int]]:
+        """Daftar celah bebas [start, end) di antara interval terblokir."""
+        gaps = []
+        prev_end = 0
+        for start, end in zip(self.starts + [self.limit], self.ends + [self.limit]):
+            if start > prev_end:
+                gaps.append((prev_end, start))
+            prev_end = max(prev_end, end)
+        return gaps
@@ -0,0 +1,236 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Any, Optional, Iterable
+
+import data_manager
+from csp_solver import DAYS, SLOTS_PER_DAY, CompiledModel, compile_model, solve_model, get_resources, iter_day_placements
+
+# Penjadwalan bersama banyak user yang berbagi resource terbatas (lapangan futsal, lab, tutor).
+# Aktivitas menyebut resource lewat 'resources'; setiap resource punya kapasitas per slot.
+# Alih-alih satu pencarian raksasa, tiap user diselesaikan sendiri (subproblem) dan dikoordinasikan
+# lewat harga resource per slot (relaksasi Lagrange, update subgradien):
+#   1. solve semua user dengan harga saat ini (resource_prices -> biaya pada urutan nilai);
+#   2. slot yang melebihi kapasitas dinaikkan harganya, slot yang longgar diturunkan;
+#   3. hanya user yang "kalah" di slot penuh (prioritas terendah) yang di-solve ulang.
+# Jika setelah max_rounds masih ada slot berlebih, user yang tersisa diperbaiki satu per satu
+# dengan slot penuh sebagai batasan keras (resource_blocked), sehingga kapasitas selalu terpenuhi.
+#
+# Contoh file grup:
+#   {"resources": {"Lapangan Futsal": 1, "Lab Komputer": 20},
+#    "users": {"andi": {"path": "andi.json", "constraints": {...}}, "budi": {"path": "budi.json"}}}
+# Jalankan: python multi_user.py group.json [--workers 4] [--save]
+
+DEFAULT_MAX_ROUNDS = 20
+DEFAULT_PRICE_STEP = 4.0
+DEFAULT_PATIENCE = 3  # ronde tanpa penurunan kelebihan sebelum langsung ke tahap perbaikan
+
+# (resource, hari, slot mulai, slot selesai, prioritas) per blok aktivitas yang memakai resource
+Footprint = List[Tuple[str, str, int, int, Any]]
+
+def _solve_job(model: CompiledModel) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    """Dijalankan di worker process (atau langsung jika workers=1)."""
+    stats: Dict[str, Any] = {}
+    schedule, status = solve_model(model, stats)
+    return schedule, status, stats
+
+def schedule_footprint(schedule: Dict[str, Dict[str, Any]], model: CompiledModel) -> Footprint:
+    """Blok aktivitas (non-fixed) pada jadwal hasil solve yang memakai resource, lewat nama aktivitas."""
+    footprint: Footprint = []
+    for day in DAYS:
+        for block in iter_day_placements(schedule.get(day, {})):
+            if block['is_fixed']:
+                continue
+            for resource in get_resources(model.activities_indexed_by_name.get(block['name'], {})):
+                footprint.append((resource, day, block['start_slot'], block['end_slot'], block['priority']))
+    return footprint
+
+class ResourceUsage:
+    """Jumlah pemakaian per resource, hari, dan slot; diperbarui inkremental per footprint user."""
+
+    def __init__(self, capacities: Dict[str, int]):
+        self.capacities = capacities
+        self.counts = {resource: {day: [0] * SLOTS_PER_DAY for day in DAYS} for resource in capacities}
+
+    def apply(self, footprint: Footprint, sign: int):
+        for resource, day, start_slot, end_slot, _ in footprint:
+            if resource not in self.counts:
+                continue  # resource tanpa kapasitas dianggap tidak terbatas
+            counts = self.counts[resource][day]
+            for slot in range(start_slot, end_slot):
+                counts[slot] += sign
+
+    def excess(self) -> int:
+        """Total unit pemakaian di atas kapasitas (ukuran pelanggaran untuk deteksi stagnasi)."""
+        return sum(
+            max(0, count - self.capacities[resource])
+            for resource, days in self.counts.items()
+            for counts in days.values()
+            for count in counts
+        )
+
+    def overloaded(self) -> List[Tuple[str, str, int]]:
+        """Daftar (resource, hari, slot) yang pemakaiannya melebihi kapasitas."""
+        return [
+            (resource, day, slot)
+            for resource, days in self.counts.items()
+            for day, counts in days.items()
+            for slot, count in enumerate(counts)
+            if count > self.capacities[resource]
+        ]
+
+    def full_blocks(self, resources: Iterable[str]) -> Dict[str, Dict[str, List[List[int]]]]:
+        """Format resource_blocked: interval slot yang kapasitasnya sudah habis."""
+        blocked: Dict[str, Dict[str, List[List[int]]]] = {}
+        for resource in resources:
+            if resource not in self.counts:
+                continue
+            capacity = self.capacities[resource]
+            for day, counts in self.counts[resource].items():
+                for slot, count in enumerate(counts):
+                    if count < capacity:
+                        continue
+                    day_blocks = blocked.setdefault(resource, {}).setdefault(day, [])
+                    if day_blocks and day_blocks[-1][1] == slot:
+                        day_blocks[-1][1] = slot + 1
+                    else:
+                        day_blocks.append([slot, slot + 1])
+        return blocked
+
+def _user_resources(model: CompiledModel) -> List[str]:
+    return sorted({resource for act in model.activities for resource in get_resources(act)})
+
+def _losers(footprints: Dict[str, Footprint], usage: ResourceUsage, order: Dict[str, int]) -> List[str]:
+    """User yang harus pindah: di setiap slot berlebih, pemegang dengan prioritas terendah di luar kapasitas."""
+    holders: Dict[Tuple[str, str, int], List[Tuple[Any, int, str]]] = {}
+    for user, footprint in footprints.items():
+        for resource, day, start_slot, end_slot, priority in footprint:
+            if resource not in usage.counts:
+                continue
+            counts = usage.counts[resource][day]
+            for slot in range(start_slot, end_slot):
+                if counts[slot] > usage.capacities[resource]:
+                    holders.setdefault((resource, day, slot), []).append((priority or 0, order[user], user))
+
+    losers = set()
+    for (resource, _, _), slot_holders in holders.items():
+        slot_holders.sort(key=lambda holder: (-holder[0], holder[1]))
+        losers.update(user for _, _, user in slot_holders[usage.capacities[resource]:])
+    return sorted(losers, key=order.get)
+
+def solve_group(
+    users: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]],
+    capacities: Dict[str, int],
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    price_step: float = DEFAULT_PRICE_STEP,
+    workers: int = 1,
+    patience: int = DEFAULT_PATIENCE,
+) -> Dict[str, Any]:
+    """
+    Menjadwalkan users ({user: (data, constraints)}) bersama dengan kapasitas resource per slot.
+    Ronde harga berhenti lebih awal jika kelebihan tidak turun selama patience ronde
+    (permintaan melebihi kapasitas total), lalu sisa konflik diselesaikan di tahap perbaikan.
+    Hasil: schedules {user: (final_schedule, status)}, rounds, solves, repaired (user yang diperbaiki
+    dengan batasan keras), overloads (sisa slot berlebih, selalu kosong), prices (harga akhir).
+    """
+    order = {user: i for i, user in enumerate(users)}
+    models = {user: compile_model(data, constraints) for user, (data, constraints) in users.items()}
+    user_resources = {user: _user_resources(model) for user, model in models.items()}
+    prices = {resource: {day: [0.0] * SLOTS_PER_DAY for day in DAYS} for resource in capacities}
+
+    usage = ResourceUsage(capacities)
+    footprints: Dict[str, Footprint] = {user: [] for user in users}
+    schedules: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    result: Dict[str, Any] = {'rounds': 0, 'solves': 0, 'repaired': []}
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        def run(jobs: Dict[str, CompiledModel]):
+            solved = pool.map(_solve_job, jobs.values(), chunksize=8) if pool else map(_solve_job, jobs.values())
+            for user, (schedule, status, _) in zip(jobs, solved):
+                usage.apply(footprints[user], -1)
+                footprints[user] = schedule_footprint(schedule, models[user])
+                usage.apply(footprints[user], 1)
+                schedules[user] = (schedule, status)
+            result['solves'] += len(jobs)
+
+        pending = list(users)
+        best_excess, stalled = None, 0
+        for _ in range(max_rounds):
+            result['rounds'] += 1
+            run({
+                user: models[user]._replace(constraints={
+                    **models[user].constraints,
+                    'resource_prices': {r: prices[r] for r in user_resources[user] if r in prices},
+                })
+                for user in pending
+            })
+            excess = usage.excess()
+            if not excess:
+                break
+            if best_excess is None or excess < best_excess:
+                best_excess, stalled = excess, 0
+            else:
+                stalled += 1
+                if stalled >= patience:
+                    break
+            # Subgradien: harga naik sebanding kelebihan pemakaian, turun (min 0) di slot yang longgar
+            for resource, days in usage.counts.items():
+                capacity = capacities[resource]
+                for day, counts in days.items():
+                    day_prices = prices[resource][day]
+                    for slot, count in enumerate(counts):
+                        if count != capacity and (count > capacity or day_prices[slot]):
+                            day_prices[slot] = max(0.0, day_prices[slot] + price_step * (count - capacity))
+            pending = _losers(footprints, usage, order)
+
+        # Perbaikan: user yang masih kalah di-solve ulang satu per satu dengan slot penuh sebagai batasan keras
+        for user in _losers(footprints, usage, order):
+            usage.apply(footprints[user], -1)
+            footprints[user] = []
+            model = models[user]
+            run({user: model._replace(constraints={
+                **model.constraints,
+                'resource_blocked': usage.full_blocks(user_resources[user]),
+            })})
+            result['repaired'].append(user)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    result['schedules'] = schedules
+    result['overloads'] = usage.overloaded()
+    result['prices'] = prices
+    return result
+
+def load_group(path: str) -> Tuple[Dict[str, Tuple[Dict, Dict]], Dict[str, int], Dict[str, str]]:
+    """Membaca file grup: (users, kapasitas resource, path data per user)."""
+    with open(path, 'r') as f:
+        group = json.load(f)
+    users, paths = {}, {}
+    for user, entry in (group.get('users') or {}).items():
+        paths[user] = entry.get('path', f"{user}.json")
+        users[user] = (data_manager.load_data(paths[user]), entry.get('constraints') or {})
+    return users, {name: int(capacity) for name, capacity in (group.get('resources') or {}).items()}, paths
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Penjadwalan bersama multi-user dengan resource terbatas")
+    parser.add_argument('group', help="file JSON grup (resources + users)")
+    parser.add_argument('--workers', type=int, default=1, help="jumlah worker process untuk solve per user")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_MAX_ROUNDS, help="maksimum ronde harga")
+    parser.add_argument('--save', action='store_true', help="simpan generated_schedule ke file data tiap user")
+    args = parser.parse_args(argv)
+
+    users, capacities, paths = load_group(args.group)
+    result = solve_group(users, capacities, max_rounds=args.rounds, workers=args.workers)
+    for user, (schedule, status) in result['schedules'].items():
+        print(f"{user}: {status}")
+        if args.save and status == 'SUCCESS':
+            data = users[user][0]
+            data['generated_schedule'] = schedule
+            data_manager.save_data(data, paths[user])
+    print(f"{len(users)} user, {result['rounds']} ronde, {result['solves']} solve, "
+          f"{len(result['repaired'])} diperbaiki, {len(result['overloads'])} slot berlebih")
+
+if __name__ == '__main__':
+    main()
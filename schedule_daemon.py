@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+import data_manager
+from csp_solver import DAYS, CompiledModel, compile_model, solve_model, get_slot_index
+from schedule_validator import validate_data
+
+# Daemon penjadwalan lokal: menyimpan dataset, model terkompilasi, dan cache solusi di memori,
+# melayani permintaan JSON per baris lewat Unix socket (atau TCP localhost).
+#
+# Contoh permintaan (satu objek JSON per baris):
+#   {"id": 1, "op": "load", "user": "andi", "path": "data.json"}
+#   {"id": 2, "op": "solve", "user": "andi", "constraints": {...}, "save": true}
+#   {"id": 3, "op": "validate", "user": "andi", "constraints": {...}}
+#   {"id": 4, "op": "edit", "user": "andi", "day": "Senin", "time": "10:00", "action": "lock"}
+#   {"id": 5, "op": "stats"}
+
+DEFAULT_SOCKET_PATH = "schedule.sock"
+MODEL_CACHE_SIZE = 128
+SOLUTION_CACHE_SIZE = 512
+EDIT_ACTIONS = ['lock', 'unlock', 'remove', 'ganti_nama']
+
+def _solve_job(model: CompiledModel) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    """Dijalankan di worker process: solve CPU-bound tanpa memblokir event loop."""
+    stats: Dict[str, Any] = {}
+    schedule, status = solve_model(model, stats)
+    return schedule, status, stats
+
+def _constraints_key(constraints: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(constraints, sort_keys=True, default=str).encode()).hexdigest()
+
+def _cache_put(cache: OrderedDict, key: Any, value: Any, limit: int):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+class SchedulerDaemon:
+    """State hangat daemon: dataset per user, model terkompilasi, cache solusi, dan solve yang sedang berjalan."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.datasets: Dict[str, Dict[str, Any]] = {}  # user -> {'path', 'data', 'mtime', 'version'}
+        self.models: OrderedDict = OrderedDict()       # (user, version, constraints_key) -> CompiledModel
+        self.solutions: OrderedDict = OrderedDict()    # (user, version, constraints_key) -> (schedule, status, stats)
+        self.inflight: Dict[str, Tuple[Tuple, asyncio.Future]] = {}  # user -> (key, future)
+        self.solve_locks: Dict[str, asyncio.Lock] = {}  # user -> lock; paling banyak satu solve per user
+        self.counters = {'requests': 0, 'solves': 0, 'cache_hits': 0, 'coalesced': 0}
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    # --- Dataset ---
+    def _load(self, user: str, path: str) -> Dict[str, Any]:
+        previous = self.datasets.get(user)
+        dataset = {
+            'path': path,
+            'data': data_manager.load_data(path),
+            'mtime': os.path.getmtime(path) if os.path.exists(path) else None,
+            'version': previous['version'] + 1 if previous else 0,
+        }
+        self.datasets[user] = dataset
+        return dataset
+
+    def _dataset(self, user: str) -> Dict[str, Any]:
+        """Dataset user; dimuat ulang jika file berubah di luar daemon."""
+        dataset = self.datasets.get(user)
+        if dataset is None:
+            raise KeyError(f"User '{user}' belum dimuat (gunakan op 'load').")
+        path = dataset['path']
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime != dataset['mtime']:
+            dataset = self._load(user, path)
+        return dataset
+
+    async def _save(self, dataset: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, data_manager.save_data, dataset['data'], dataset['path'])
+        if os.path.exists(dataset['path']):
+            dataset['mtime'] = os.path.getmtime(dataset['path'])
+
+    def _model(self, user: str, dataset: Dict[str, Any], constraints: Dict[str, Any], key: Tuple) -> CompiledModel:
+        model = self.models.get(key)
+        if model is None:
+            model = compile_model(dataset['data'], constraints)
+            _cache_put(self.models, key, model, MODEL_CACHE_SIZE)
+        else:
+            self.models.move_to_end(key)
+        return model
+
+    # --- Operasi ---
+    async def op_load(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        dataset = self._load(request['user'], request.get('path') or data_manager.FILE_PATH)
+        data = dataset['data']
+        return {
+            'version': dataset['version'],
+            'fixed_schedule': len(data.get('fixed_schedule') or []),
+            'activities': len(data.get('activities') or []),
+        }
+
+    async def op_solve(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        user = request['user']
+        constraints = request.get('constraints') or {}
+        dataset = self._dataset(user)
+        key = (user, dataset['version'], _constraints_key(constraints))
+
+        cached = self.solutions.get(key)
+        if cached is None:
+            inflight = self.inflight.get(user)
+            if inflight is not None and inflight[0] == key:
+                # Permintaan identik untuk user yang sama sedang berjalan: ikut menunggu hasilnya
+                self.counters['coalesced'] += 1
+                cached = await asyncio.shield(inflight[1])
+            else:
+                # Solve lain untuk user ini dijalankan bergiliran lewat lock per user (antrean FIFO),
+                # sehingga beberapa permintaan yang menunggu tidak berjalan bersamaan saat solve selesai
+                async with self.solve_locks.setdefault(user, asyncio.Lock()):
+                    cached = self.solutions.get(key)
+                    if cached is None:
+                        cached = await self._run_solve(user, dataset, constraints, key)
+                    else:
+                        # permintaan identik yang mengantre lebih dulu sudah menghasilkan solusinya
+                        self.counters['coalesced'] += 1
+        else:
+            self.counters['cache_hits'] += 1
+            self.solutions.move_to_end(key)
+
+        schedule, status, stats = cached
+        if request.get('save') and status == 'SUCCESS':
+            # Data bisa berubah (edit/load) selama solve ditunggu: jangan timpa dengan hasil dari data lama
+            if self.datasets.get(user) is not dataset or dataset['version'] != key[1]:
+                raise ValueError(
+                    f"Data user '{user}' berubah selama solve (versi {key[1]} -> "
+                    f"{self.datasets[user]['version'] if user in self.datasets else '-'}); jadwal tidak disimpan, ulangi solve."
+                )
+            dataset['data']['generated_schedule'] = schedule
+            dataset['version'] += 1
+            await self._save(dataset)
+        return {'status': status, 'stats': stats, 'schedule': schedule}
+
+    async def _run_solve(self, user: str, dataset: Dict[str, Any], constraints: Dict[str, Any], key: Tuple):
+        loop = asyncio.get_running_loop()
+        model = self._model(user, dataset, constraints, key)
+        future = loop.run_in_executor(self.pool, _solve_job, model)
+        self.inflight[user] = (key, future)
+        self.counters['solves'] += 1
+        try:
+            result = await future
+        finally:
+            del self.inflight[user]
+        _cache_put(self.solutions, key, result, SOLUTION_CACHE_SIZE)
+        return result
+
+    async def op_validate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        dataset = self._dataset(request['user'])
+        violations = validate_data(dataset['data'], request.get('constraints') or {})
+        return {'valid': not violations, 'violations': violations}
+
+    async def op_edit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Sama dengan edit_manual_schedule: lock/unlock/remove/ganti_nama pada satu slot."""
+        dataset = self._dataset(request['user'])
+        data = dataset['data']
+        day = request.get('day')
+        action = request.get('action')
+        if day not in DAYS or action not in EDIT_ACTIONS:
+            raise ValueError(f"Hari harus salah satu dari {DAYS} dan aksi salah satu dari {EDIT_ACTIONS}.")
+
+        slot_key = str(get_slot_index(request.get('time', '')))
+        day_slots = (data.get('generated_schedule') or {}).get(day) or {}
+        if slot_key not in day_slots:
+            raise ValueError("Slot waktu tidak valid atau kosong.")
+
+        slot_data = day_slots[slot_key]
+        if action == 'lock':
+            slot_data['is_locked'] = True
+        elif action == 'unlock':
+            slot_data['is_locked'] = False
+        elif action == 'remove':
+            if slot_data.get('is_fixed'):
+                raise ValueError("Tidak bisa menghapus jadwal fixed (kuliah) dari sini.")
+            del day_slots[slot_key]
+        elif action == 'ganti_nama':
+            slot_data['name'] = request.get('name') or slot_data['name']
+
+        # Model dan solusi lama tidak lagi berlaku untuk versi data ini
+        dataset['version'] += 1
+        await self._save(dataset)
+        return {'version': dataset['version']}
+
+    async def op_stats(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            'users': sorted(self.datasets),
+            'models_cached': len(self.models),
+            'solutions_cached': len(self.solutions),
+            'inflight': len(self.inflight),
+        }
+
+    async def op_ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'pong': True}
+
+    # --- Protokol ---
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.counters['requests'] += 1
+        handler = getattr(self, f"op_{request.get('op')}", None)
+        if handler is None:
+            return {'id': request.get('id'), 'ok': False, 'error': f"Operasi tidak dikenal: {request.get('op')}"}
+        try:
+            return {'id': request.get('id'), 'ok': True, 'result': await handler(request)}
+        except Exception as e:
+            return {'id': request.get('id'), 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = set()
+        write_lock = asyncio.Lock()
+
+        async def respond(request):
+            response = await self.handle_request(request)
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    request = None
+                    async with write_lock:
+                        writer.write(json.dumps({'ok': False, 'error': f"JSON tidak valid: {e}"}).encode() + b'\n')
+                        await writer.drain()
+                if isinstance(request, dict):
+                    # Setiap permintaan diproses sebagai task sendiri agar satu koneksi bisa mengirim banyak
+                    task = asyncio.create_task(respond(request))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Optional[str] = None, host: str = '127.0.0.1', port: Optional[int] = None):
+        if port is not None:
+            server = await asyncio.start_server(self._handle_client, host, port)
+        else:
+            socket_path = socket_path or DEFAULT_SOCKET_PATH
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self._handle_client, socket_path)
+        # SIGTERM menghentikan server dengan rapi (socket dihapus, worker dimatikan)
+        serve_task = asyncio.ensure_future(server.serve_forever())
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serve_task.cancel)
+        try:
+            async with server:
+                await serve_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+# --- Klien sederhana ---
+def send_request(request: Dict[str, Any], socket_path: Optional[str] = DEFAULT_SOCKET_PATH,
+                 host: str = '127.0.0.1', port: Optional[int] = None) -> Dict[str, Any]:
+    """Mengirim satu permintaan ke daemon dan mengembalikan responsnya (sinkron)."""
+    if port is not None:
+        conn = socket.create_connection((host, port))
+    else:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(socket_path)
+    with conn, conn.makefile('rwb') as stream:
+        stream.write(json.dumps(request).encode() + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon penjadwalan Schedule.ai")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help="Path Unix socket")
+    parser.add_argument('--port', type=int, help="Gunakan TCP localhost pada port ini, bukan Unix socket")
+    parser.add_argument('--workers', type=int, help="Jumlah worker process untuk solve")
+    args = parser.parse_args()
+
+    daemon = SchedulerDaemon(workers=args.workers)
+    try:
+        asyncio.run(daemon.serve(socket_path=args.socket, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import csv
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Tuple, Any, Iterable, Iterator, Optional, TextIO
+
+import data_manager
+from csp_solver import DAYS, START_HOUR, SLOT_DURATION, SLOTS_PER_DAY, get_time_from_index, iter_day_placements
+
+# Ekspor jadwal hasil solve_csp ke iCalendar (.ics) dan CSV.
+# Semua ekspor berjalan lewat generator: satu event / satu baris ditulis lalu dilepas,
+# sehingga batch ribuan user tetap memakai memori konstan (satu jadwal dalam memori).
+# Jalankan: python schedule_export.py ics|csv output_file data1.json [data2.json ...]
+
+CSV_FIELDS = ['user', 'type', 'name', 'day', 'start_time', 'end_time', 'category', 'priority', 'duration', 'is_locked']
+ICS_PRODID = "-//Schedule.ai//CLI Scheduler//ID"
+
+# --- 1. Event dari jadwal per-slot ---
+
+def iter_events(schedule: Dict[str, Dict[Any, Any]], user: str = "") -> Iterator[Dict[str, Any]]:
+    """
+    Menggabungkan entri per-slot (output solve_csp / generated_schedule) menjadi event.
+    Hasil: dict user, type ('fixed'/'activity'), name, day, start_slot, end_slot, category, priority, is_locked.
+    """
+    for day in DAYS:
+        for block in iter_day_placements((schedule or {}).get(day, {})):
+            yield {
+                'user': user,
+                'type': 'fixed' if block['is_fixed'] else 'activity',
+                'name': block['name'],
+                'day': day,
+                'start_slot': block['start_slot'],
+                'end_slot': block['end_slot'],
+                'category': block['category'],
+                'priority': block['priority'],
+                'is_locked': block['is_locked'],
+            }
+
+def user_from_path(path: str) -> str:
+    """Nama user dari path file data: path tanpa ekstensi (u1/data.json -> 'u1/data'), unik per file."""
+    return os.path.splitext(os.path.normpath(path))[0]
+
+def iter_data_files(paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Memuat generated_schedule tiap file satu per satu: (nama user, jadwal), lihat user_from_path."""
+    for path in paths:
+        data = data_manager.load_data(path)
+        yield user_from_path(path), data.get('generated_schedule') or {}
+
+# --- 2. CSV ---
+
+def format_end_time(slot: int) -> str:
+    """Waktu selesai HH:MM; akhir hari ditulis 24:00 (bukan 00:00) agar tetap setelah waktu mulai."""
+    return "24:00" if slot >= SLOTS_PER_DAY else get_time_from_index(slot)
+
+def iter_csv_rows(schedules: Iterable[Tuple[str, Dict]]) -> Iterator[Dict[str, Any]]:
+    """Baris CSV (dict dengan kunci CSV_FIELDS) untuk setiap event dari (user, jadwal)."""
+    for user, schedule in schedules:
+        for event in iter_events(schedule, user):
+            yield {
+                'user': event['user'],
+                'type': event['type'],
+                'name': event['name'],
+                'day': event['day'],
+                'start_time': get_time_from_index(event['start_slot']),
+                'end_time': format_end_time(event['end_slot']),
+                'category': event['category'] or '',
+                'priority': event['priority'] if event['type'] == 'activity' else '',
+                'duration': (event['end_slot'] - event['start_slot']) * SLOT_DURATION / 60,
+                'is_locked': 'ya' if event['is_locked'] else '',
+            }
+
+def write_csv(out: TextIO, schedules: Iterable[Tuple[str, Dict]]) -> int:
+    """Menulis CSV secara bertahap ke out. Mengembalikan jumlah baris event."""
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for row in iter_csv_rows(schedules):
+        writer.writerow(row)
+        count += 1
+    return count
+
+# --- 3. iCalendar (RFC 5545) ---
+
+def current_week_start(today: Optional[date] = None) -> date:
+    """Tanggal Senin pada minggu berjalan."""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+def _slot_datetime(week_start: date, day: str, slot: int) -> datetime:
+    # slot terakhir (24:00) otomatis bergulir ke 00:00 hari berikutnya
+    base = datetime.combine(week_start, datetime.min.time()) + timedelta(days=DAYS.index(day))
+    return base + timedelta(minutes=START_HOUR * 60 + slot * SLOT_DURATION)
+
+def _ics_escape(text: Any) -> str:
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+def _ics_fold(line: str) -> Iterator[str]:
+    """Melipat baris > 75 oktet sesuai RFC 5545 (baris lanjutan diawali spasi)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        yield line
+        return
+    chunk = ''
+    size = 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > 75:
+            yield chunk
+            chunk = ' '
+            size = 1
+        chunk += char
+        size += char_size
+    yield chunk
+
+def iter_ics_lines(schedules: Iterable[Tuple[str, Dict]], week_start: Optional[date] = None,
+                   recurring: bool = True) -> Iterator[str]:
+    """
+    Baris iCalendar (tanpa CRLF) untuk semua event. Event diletakkan pada minggu week_start
+    (default: minggu berjalan); recurring=True menambahkan RRULE mingguan.
+    """
+    week_start = week_start or current_week_start()
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield 'BEGIN:VCALENDAR'
+    yield 'VERSION:2.0'
+    yield f'PRODID:{ICS_PRODID}'
+    yield 'CALSCALE:GREGORIAN'
+    for user, schedule in schedules:
+        for event in iter_events(schedule, user):
+            start = _slot_datetime(week_start, event['day'], event['start_slot'])
+            end = _slot_datetime(week_start, event['day'], event['end_slot'])
+            uid = f"{user or 'user'}-{event['day']}-{event['start_slot']}-{event['name']}".replace(' ', '_')
+            lines = [
+                'BEGIN:VEVENT',
+                f'UID:{_ics_escape(uid)}@schedule.ai',
+                f'DTSTAMP:{stamp}',
+                f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",
+                f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}",
+                f"SUMMARY:{_ics_escape(event['name'])}",
+            ]
+            if event['category']:
+                lines.append(f"CATEGORIES:{_ics_escape(event['category'])}")
+            # X-properti dipakai importer untuk membedakan jadwal fixed dan aktivitas
+            lines.append(f"X-SCHEDULE-TYPE:{event['type']}")
+            if event['type'] == 'activity':
+                lines.append(f"X-SCHEDULE-PRIORITY:{event['priority']}")
+            if event['is_locked']:
+                lines.append('X-SCHEDULE-LOCKED:TRUE')
+            if recurring:
+                lines.append('RRULE:FREQ=WEEKLY')
+            lines.append('END:VEVENT')
+            for line in lines:
+                yield from _ics_fold(line)
+    yield 'END:VCALENDAR'
+
+def write_ics(out: TextIO, schedules: Iterable[Tuple[str, Dict]], week_start: Optional[date] = None,
+              recurring: bool = True) -> int:
+    """Menulis iCalendar secara bertahap ke out. Mengembalikan jumlah event."""
+    count = 0
+    for line in iter_ics_lines(schedules, week_start, recurring):
+        if line == 'BEGIN:VEVENT':
+            count += 1
+        out.write(line + '\r\n')
+    return count
+
+# --- 4. Ekspor ke file ---
+
+def export_schedule(schedule: Dict, file_path: str, fmt: Optional[str] = None, user: str = "") -> int:
+    """Mengekspor satu jadwal ke file .ics / .csv (format diambil dari ekstensi jika fmt kosong)."""
+    return export_batch([(user, schedule)], file_path, fmt)
+
+def export_batch(schedules: Iterable[Tuple[str, Dict]], file_path: str, fmt: Optional[str] = None) -> int:
+    """Mengekspor banyak jadwal (iterable (user, jadwal), boleh generator) ke satu file."""
+    fmt = (fmt or file_path.rsplit('.', 1)[-1]).lower()
+    if fmt not in ('ics', 'csv'):
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt} (gunakan ics atau csv)")
+    # newline='' agar csv/ics mengatur sendiri akhir baris (CRLF)
+    with open(file_path, 'w', encoding='utf-8', newline='') as out:
+        if fmt == 'csv':
+            return write_csv(out, schedules)
+        return write_ics(out, schedules)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4:
+        print("Penggunaan: python schedule_export.py ics|csv output_file data1.json [data2.json ...]")
+        sys.exit(1)
+    total = export_batch(iter_data_files(sys.argv[3:]), sys.argv[2], sys.argv[1])
+    print(f"{total} event diekspor ke {sys.argv[2]}")
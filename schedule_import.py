@@ -0,0 +1,281 @@
+import csv
+import sys
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Dict, Tuple, Any, Iterator, Optional
+
+import data_manager
+from csp_solver import DAYS, SLOTS_PER_DAY, SLOT_DURATION, get_slot_index, get_time_from_index
+from schedule_export import format_end_time
+
+# Impor massal jadwal tetap dan aktivitas dari CSV / iCalendar (.ics).
+# Baris dibaca bertahap, divalidasi per baris (error tidak menghentikan batch),
+# lalu semua entri yang lolos disimpan dengan satu kali save_data.
+# Format CSV sama dengan schedule_export (kolom type, name, day, start_time, end_time, ...).
+# Jalankan: python schedule_import.py file.csv|file.ics [data.json]
+
+DEFAULT_PRIORITY = 3
+
+class ImportRowError(ValueError):
+    """Baris impor tidak valid; pesan ditampilkan apa adanya di laporan."""
+
+# --- 1. Pembaca baris (generator) ---
+
+_CSV_EXTRA_KEY = '__extra__'
+
+def iter_csv_records(file_path: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Menghasilkan (nomor baris, record) dari CSV ber-header. Kunci header dinormalisasi ke huruf kecil.
+    Baris dengan kolom lebih banyak dari header menghasilkan ImportRowError (dilaporkan per baris).
+    """
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f, restkey=_CSV_EXTRA_KEY)
+        for row in reader:
+            extra = row.pop(_CSV_EXTRA_KEY, None)
+            if extra is not None:
+                yield reader.line_num, ImportRowError(
+                    f"Jumlah kolom ({len(row) + len(extra)}) melebihi header ({len(row)})"
+                )
+                continue
+            record = {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+            if not any(record.values()):
+                continue
+            yield reader.line_num, record
+
+def _iter_ics_lines(f) -> Iterator[Tuple[int, str]]:
+    """Baris logis iCalendar (baris lanjutan yang diawali spasi/tab digabung), dengan nomor baris awal."""
+    current = None
+    current_no = 0
+    for line_no, raw in enumerate(f, 1):
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current_no, current
+        current, current_no = line, line_no
+    if current is not None:
+        yield current_no, current
+
+def _ics_unescape(text: str) -> str:
+    return text.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+def _parse_ics_datetime(value: str) -> datetime:
+    value = value.rstrip('Z')
+    for fmt in ('%Y%m%dT%H%M%S', '%Y%m%dT%H%M'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ImportRowError(f"Format tanggal/waktu iCalendar tidak dikenal: {value}")
+
+def _ics_event_record(props: Dict[str, str]) -> Dict[str, Any]:
+    if 'dtstart' not in props or 'dtend' not in props:
+        raise ImportRowError("VEVENT tanpa DTSTART/DTEND")
+    start = _parse_ics_datetime(props['dtstart'])
+    end = _parse_ics_datetime(props['dtend'])
+    if start.weekday() >= len(DAYS):
+        raise ImportRowError(f"Event jatuh pada akhir pekan ({start:%Y-%m-%d})")
+    # event yang berakhir tepat tengah malam dicatat sebagai 24:00 pada hari yang sama
+    end_minutes = (end.date() - start.date()).days * 24 * 60 + end.hour * 60 + end.minute
+    return {
+        'type': props.get('x-schedule-type', 'fixed'),
+        'name': props.get('summary', ''),
+        'day': DAYS[start.weekday()],
+        'start_time': f"{start.hour:02d}:{start.minute:02d}",
+        'end_time': f"{end_minutes // 60:02d}:{end_minutes % 60:02d}",
+        'category': props.get('categories', ''),
+        'priority': props.get('x-schedule-priority', ''),
+        'duration': str((end - start).total_seconds() / 3600),
+    }
+
+def iter_ics_records(file_path: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Menghasilkan (nomor baris BEGIN:VEVENT, record) per VEVENT. Event tanpa X-SCHEDULE-TYPE dianggap
+    jadwal tetap. Jika event tidak bisa dibaca, record berupa ImportRowError agar dilaporkan per baris.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        props: Optional[Dict[str, str]] = None
+        event_no = 0
+        for line_no, line in _iter_ics_lines(f):
+            key, _, value = line.partition(':')
+            name = key.split(';', 1)[0].strip().lower()
+            if name == 'begin' and value.strip().upper() == 'VEVENT':
+                props, event_no = {}, line_no
+            elif name == 'end' and value.strip().upper() == 'VEVENT' and props is not None:
+                try:
+                    yield event_no, _ics_event_record(props)
+                except ImportRowError as e:
+                    yield event_no, e
+                props = None
+            elif props is not None:
+                props[name] = _ics_unescape(value.strip())
+
+def iter_records(file_path: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """Pembaca sesuai format (diambil dari ekstensi jika fmt kosong)."""
+    fmt = (fmt or file_path.rsplit('.', 1)[-1]).lower()
+    if fmt == 'csv':
+        return iter_csv_records(file_path)
+    if fmt == 'ics':
+        return iter_ics_records(file_path)
+    raise ValueError(f"Format impor tidak dikenal: {fmt} (gunakan csv atau ics)")
+
+# --- 2. Validasi & normalisasi ---
+
+def _normalize_day(value: str) -> str:
+    for day in DAYS:
+        if day.lower() == value.strip().lower():
+            return day
+    raise ImportRowError(f"Hari tidak valid: '{value}' (pilihan: {', '.join(DAYS)})")
+
+def _time_slot(value: str, round_up: bool) -> int:
+    """Waktu HH:MM -> indeks slot. Waktu di antara slot dibulatkan (mulai ke bawah, selesai ke atas)."""
+    try:
+        h, m = map(int, value.split(':'))
+        if not (0 <= m < 60):
+            raise ValueError
+    except (AttributeError, ValueError):
+        raise ImportRowError(f"Format waktu tidak valid: '{value}' (gunakan HH:MM)")
+    slot = get_slot_index(f"{h:02d}:{m:02d}")
+    if round_up and m % SLOT_DURATION:
+        slot += 1
+    if not (0 <= slot <= SLOTS_PER_DAY):
+        raise ImportRowError(f"Waktu {value} di luar rentang {get_time_from_index(0)}-{format_end_time(SLOTS_PER_DAY)}")
+    return slot
+
+def normalize_fixed(record: Dict[str, Any]) -> Tuple[Dict[str, Any], int, int]:
+    """Record -> (entri fixed_schedule, slot mulai, slot selesai)."""
+    name = record.get('name', '').strip()
+    if not name:
+        raise ImportRowError("Nama kosong")
+    day = _normalize_day(record.get('day', ''))
+    start_slot = _time_slot(record.get('start_time', ''), round_up=False)
+    end_slot = _time_slot(record.get('end_time', ''), round_up=True)
+    if start_slot >= end_slot:
+        raise ImportRowError(f"Waktu mulai {record.get('start_time')} harus sebelum waktu selesai {record.get('end_time')}")
+    entry = {
+        'name': name,
+        'day': day,
+        'start_time': get_time_from_index(start_slot),
+        'end_time': format_end_time(end_slot),  # 24:00, bukan 00:00, agar blok sampai tengah malam tidak hilang
+        'is_locked': True,  # Jadwal fixed selalu terkunci
+    }
+    if record.get('category'):
+        entry['category'] = record['category']
+    return entry, start_slot, end_slot
+
+def normalize_activity(record: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Record -> (entri aktivitas tanpa id, jumlah per minggu)."""
+    name = record.get('name', '').strip()
+    if not name:
+        raise ImportRowError("Nama kosong")
+    try:
+        duration = float(record.get('duration') or 0)
+    except ValueError:
+        raise ImportRowError(f"Durasi tidak valid: '{record.get('duration')}'")
+    if duration <= 0 or duration * 60 % SLOT_DURATION:
+        raise ImportRowError(f"Durasi harus kelipatan {SLOT_DURATION} menit dan > 0 (dapat: {record.get('duration')} jam)")
+    try:
+        priority = int(record.get('priority') or DEFAULT_PRIORITY)
+        count = int(record.get('count') or 1)
+    except ValueError:
+        raise ImportRowError(f"Prioritas/jumlah harus bilangan bulat: '{record.get('priority')}', '{record.get('count')}'")
+    if not (1 <= priority <= 5):
+        raise ImportRowError(f"Prioritas harus 1-5 (dapat: {priority})")
+    if count < 1:
+        raise ImportRowError(f"Jumlah per minggu harus >= 1 (dapat: {count})")
+    entry = {
+        'name': name,
+        # durasi bulat tetap disimpan sebagai int seperti input interaktif
+        'duration': int(duration) if duration.is_integer() else duration,
+        'priority': priority,
+    }
+    if record.get('category'):
+        entry['category'] = record['category']
+    return entry, count
+
+# --- 3. Impor batch ---
+
+def _fixed_index(fixed_schedule: List[Dict[str, Any]]) -> Dict[str, List[Tuple[int, int, str]]]:
+    """Interval fixed_schedule per hari, terurut: (slot mulai, slot selesai, nama)."""
+    index: Dict[str, List[Tuple[int, int, str]]] = {day: [] for day in DAYS}
+    for entry in fixed_schedule or []:
+        if entry.get('day') not in index:
+            continue
+        start_slot = max(0, get_slot_index(entry.get('start_time', '00:00')))
+        end_slot = min(SLOTS_PER_DAY, get_slot_index(entry.get('end_time', '00:00')))
+        if end_slot > start_slot:
+            insort(index[entry['day']], (start_slot, end_slot, entry.get('name', 'FIXED')))
+    return index
+
+def _find_overlap(day_index: List[Tuple[int, int, str]], start_slot: int, end_slot: int) -> Optional[Tuple[int, int, str]]:
+    # fixed_schedule yang ada boleh saling tumpang tindih (blok panjang bisa menutupi blok sesudahnya),
+    # jadi semua interval yang mulai sebelum end_slot diperiksa mundur dari posisi sisip
+    for j in range(bisect_left(day_index, (end_slot,)) - 1, -1, -1):
+        if start_slot < day_index[j][1]:
+            return day_index[j]
+    return None
+
+def import_records(data: Dict[str, Any], records: Iterator[Tuple[int, Any]]) -> Dict[str, Any]:
+    """
+    Memvalidasi record satu per satu dan menambahkannya ke data (di memori).
+    Jadwal tetap dicek tumpang tindih terhadap fixed_schedule yang ada dan baris sebelumnya di batch.
+    Mengembalikan laporan: fixed_added, activities_added, errors [{'row', 'name', 'message'}].
+    """
+    data.setdefault('fixed_schedule', [])
+    data.setdefault('activities', [])
+    index = _fixed_index(data['fixed_schedule'])
+    stamp = int(time.time())
+    report: Dict[str, Any] = {'fixed_added': 0, 'activities_added': 0, 'errors': []}
+
+    for row_no, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            kind = (record.get('type') or 'fixed').strip().lower()
+            if kind == 'fixed':
+                entry, start_slot, end_slot = normalize_fixed(record)
+                clash = _find_overlap(index[entry['day']], start_slot, end_slot)
+                if clash:
+                    raise ImportRowError(
+                        f"Bentrok dengan '{clash[2]}' ({entry['day']} "
+                        f"{get_time_from_index(clash[0])}-{format_end_time(clash[1])})"
+                    )
+                insort(index[entry['day']], (start_slot, end_slot, entry['name']))
+                data['fixed_schedule'].append(entry)
+                report['fixed_added'] += 1
+            elif kind == 'activity':
+                entry, count = normalize_activity(record)
+                for i in range(count):
+                    # ID unik per instance, mengikuti pola input_activities (nomor baris mencegah tabrakan)
+                    data['activities'].append({'id': f"{entry['name']}_{row_no}_{i+1}_{stamp}", **entry})
+                report['activities_added'] += count
+            else:
+                raise ImportRowError(f"Tipe tidak dikenal: '{kind}' (gunakan fixed atau activity)")
+        except ImportRowError as e:
+            name = record.get('name', '') if isinstance(record, dict) else ''
+            report['errors'].append({'row': row_no, 'name': name, 'message': str(e)})
+    return report
+
+def import_file(data: Dict[str, Any], file_path: str, fmt: Optional[str] = None,
+                save_path: Optional[str] = data_manager.FILE_PATH) -> Dict[str, Any]:
+    """
+    Mengimpor file CSV/ICS ke data lalu menyimpan sekali (save_data) jika ada entri yang ditambahkan.
+    save_path=None hanya memvalidasi/menambah di memori tanpa menulis file.
+    """
+    report = import_records(data, iter_records(file_path, fmt))
+    if save_path and (report['fixed_added'] or report['activities_added']):
+        data_manager.save_data(data, save_path)
+    return report
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Penggunaan: python schedule_import.py file.csv|file.ics [data.json]")
+        sys.exit(1)
+    target = sys.argv[2] if len(sys.argv) > 2 else data_manager.FILE_PATH
+    data = data_manager.load_data(target)
+    report = import_file(data, sys.argv[1], save_path=target)
+    print(f"Jadwal tetap: +{report['fixed_added']}, aktivitas: +{report['activities_added']}, error: {len(report['errors'])}")
+    for error in report['errors']:
+        print(f"  baris {error['row']} {error['name']}: {error['message']}")
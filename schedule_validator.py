@@ -0,0 +1,378 @@
+import json
+import math
+from typing import List, Dict, Tuple, Any, Optional, Iterator, Iterable
+
+from csp_solver import (
+    DAYS,
+    SLOTS_PER_DAY,
+    SLOT_DURATION,
+    get_slot_index,
+    get_time_from_index,
+    get_week_minute,
+    is_low_priority,
+    parse_after,
+    precedence_violation,
+    extract_placements,
+    parse_soft_preferences,
+    soft_rule_matches,
+)
+
+# --- Helpers ---
+def _span_mask(start_slot: int, end_slot: int) -> int:
+    """Bitmask untuk slot [start_slot, end_slot) yang dipotong ke rentang hari."""
+    start_slot = max(0, start_slot)
+    end_slot = min(SLOTS_PER_DAY, end_slot)
+    if end_slot <= start_slot:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << start_slot
+
+def _lowest_slot(mask: int) -> int:
+    """Indeks slot terendah yang aktif pada mask."""
+    return (mask & -mask).bit_length() - 1
+
+def _violation(day: str, slot: int, name: Optional[str], constraint: str, message: str) -> Dict[str, Any]:
+    return {
+        'day': day,
+        'slot': slot,
+        'time': get_time_from_index(slot),
+        'name': name,
+        'constraint': constraint,
+        'message': message,
+    }
+
+def _fixed_masks(fixed_schedule: Optional[List[Dict]]) -> Dict[str, int]:
+    """Bitmask slot fixed per hari, dihitung dari data['fixed_schedule']."""
+    masks = {day: 0 for day in DAYS}
+    for fixed_act in fixed_schedule or []:
+        day = fixed_act.get('day')
+        if day not in masks:
+            continue
+        start_slot = get_slot_index(fixed_act.get('start_time', '00:00'))
+        end_slot = get_slot_index(fixed_act.get('end_time', '00:00'))
+        masks[day] |= _span_mask(start_slot, end_slot)
+    return masks
+
+def _forbidden_mask(constraints: Dict) -> int:
+    """Bitmask gabungan semua global_no_activity_blocks (sama untuk setiap hari)."""
+    mask = 0
+    for start_time, end_time in constraints.get('global_no_activity_blocks', []) or []:
+        mask |= _span_mask(get_slot_index(start_time), get_slot_index(end_time))
+    return mask
+
+# --- Validator ---
+def validate_schedule(
+    schedule: Dict[str, Dict[Any, Any]],
+    constraints: Dict,
+    activities: Optional[List[Dict]] = None,
+    fixed_schedule: Optional[List[Dict]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Memeriksa jadwal lengkap (day -> {slot: act}) terhadap semua batasan yang dikenal is_valid,
+    tanpa menjalankan solver. Setiap hari diperiksa dalam satu lintasan memakai bitmask slot.
+    Mengembalikan daftar pelanggaran: dict berisi day, slot, time, name, constraint, message.
+    """
+    constraints = constraints or {}
+    activities_indexed_by_name = {a['name']: a for a in activities or [] if 'name' in a}
+    fixed_masks = _fixed_masks(fixed_schedule)
+    forbidden_mask = _forbidden_mask(constraints)
+
+    mandatory_day_off = constraints.get('global_mandatory_day_off')
+    unique_limits = [
+        int(constraints[key])
+        for key in ('global_max_tasks_per_day', 'global_max_unique_activities_per_day')
+        if constraints.get(key) is not None
+    ]
+    max_tasks = min(unique_limits) if unique_limits else None
+    max_hours_per_day = constraints.get('global_max_hours_per_day')
+    max_low_priority = constraints.get('global_max_low_priority_per_day')
+    max_work_days = constraints.get('global_max_work_days')
+    work_days = 0
+    max_category_hours = constraints.get('global_max_hours_per_category_per_day', {}) or {}
+    min_gap_slots = None
+    if constraints.get('global_min_gap') is not None:
+        min_gap_slots = max(1, math.ceil(int(constraints['global_min_gap']) / SLOT_DURATION))
+
+    violations: List[Dict[str, Any]] = []
+
+    # Indeks nama -> interval (menit mingguan, terurut) untuk batasan 'after' lintas hari
+    placements_by_day = extract_placements(schedule)
+    intervals_by_name: Dict[str, Tuple[List[int], List[int]]] = {}
+    for day in DAYS:
+        for p in placements_by_day[day]:
+            starts, ends = intervals_by_name.setdefault(p['name'], ([], []))
+            starts.append(get_week_minute(day, p['start_slot']))
+            ends.append(get_week_minute(day, p['end_slot']))
+    for starts, ends in intervals_by_name.values():
+        starts.sort()
+        ends.sort()
+
+    for day in DAYS:
+        placements = placements_by_day[day]
+        free_placements = [p for p in placements if not p['is_fixed']]
+
+        # Bitmask seluruh aktivitas non-fixed pada hari ini (slot di luar hari diabaikan)
+        free_mask = 0
+        for p in free_placements:
+            free_mask |= _span_mask(p['start_slot'], p['end_slot'])
+
+        # 0. Batasan Durasi (Waktu)
+        for p in placements:
+            if p['start_slot'] < 0 or p['end_slot'] > SLOTS_PER_DAY:
+                violations.append(_violation(
+                    day, p['start_slot'], p['name'], 'time_range',
+                    f"'{p['name']}' berada di luar rentang {get_time_from_index(0)}-{get_time_from_index(SLOTS_PER_DAY)}.",
+                ))
+
+        # 1. Batasan Hari Bebas Wajib
+        if mandatory_day_off and day == mandatory_day_off:
+            for p in free_placements:
+                violations.append(_violation(
+                    day, p['start_slot'], p['name'], 'global_mandatory_day_off',
+                    f"'{p['name']}' dijadwalkan pada hari bebas wajib {day}.",
+                ))
+
+        # 2. Tumpang tindih dengan jadwal fixed (dari fixed_schedule)
+        overlap = free_mask & fixed_masks[day]
+        if overlap:
+            for p in free_placements:
+                hit = overlap & _span_mask(p['start_slot'], p['end_slot'])
+                if hit:
+                    violations.append(_violation(
+                        day, _lowest_slot(hit), p['name'], 'fixed_overlap',
+                        f"'{p['name']}' menimpa jadwal tetap.",
+                    ))
+
+        # 3. Time Blocking Global (Blok Waktu Terlarang)
+        blocked = free_mask & forbidden_mask
+        if blocked:
+            for p in free_placements:
+                hit = blocked & _span_mask(p['start_slot'], p['end_slot'])
+                if hit:
+                    violations.append(_violation(
+                        day, _lowest_slot(hit), p['name'], 'global_no_activity_blocks',
+                        f"'{p['name']}' tumpang tindih dengan blok waktu terlarang.",
+                    ))
+
+        # 4. Global Min Gap: cukup periksa pasangan blok yang berurutan
+        if min_gap_slots is not None:
+            for prev, nxt in zip(placements, placements[1:]):
+                if prev['is_fixed'] and nxt['is_fixed']:
+                    continue
+                gap = nxt['start_slot'] - prev['end_slot']
+                if gap < min_gap_slots:
+                    violations.append(_violation(
+                        day, nxt['start_slot'], nxt['name'], 'global_min_gap',
+                        f"Jeda antara '{prev['name']}' dan '{nxt['name']}' hanya {gap * SLOT_DURATION} menit.",
+                    ))
+
+        # 5. Global Max Tasks / Unique Activities per Day (aktivitas unik non-fixed)
+        if max_tasks is not None:
+            seen = []
+            for p in free_placements:
+                if p['name'] not in seen:
+                    seen.append(p['name'])
+                    if len(seen) > max_tasks:
+                        violations.append(_violation(
+                            day, p['start_slot'], p['name'], 'global_max_unique_activities_per_day',
+                            f"Lebih dari {max_tasks} aktivitas unik pada {day}.",
+                        ))
+
+        # 6. Global Max Hours per Category per Day
+        if max_category_hours:
+            category_hours: Dict[str, float] = {}
+            for p in free_placements:
+                category = p['category']
+                if not category or category not in max_category_hours:
+                    continue
+                category_hours[category] = category_hours.get(category, 0.0) + \
+                    (p['end_slot'] - p['start_slot']) * SLOT_DURATION / 60.0
+                if category_hours[category] > float(max_category_hours[category]):
+                    violations.append(_violation(
+                        day, p['start_slot'], p['name'], 'global_max_hours_per_category_per_day',
+                        f"Total {category} pada {day} menjadi {category_hours[category]:g} jam "
+                        f"(maks {float(max_category_hours[category]):g}).",
+                    ))
+
+        # 7. Global Max Hours per Day (semua aktivitas non-fixed)
+        if max_hours_per_day is not None:
+            hours = 0.0
+            for p in free_placements:
+                hours += (p['end_slot'] - p['start_slot']) * SLOT_DURATION / 60.0
+                if hours > float(max_hours_per_day):
+                    violations.append(_violation(
+                        day, p['start_slot'], p['name'], 'global_max_hours_per_day',
+                        f"Total aktivitas pada {day} menjadi {hours:g} jam (maks {float(max_hours_per_day):g}).",
+                    ))
+                    break
+
+        # 8. Global Max Low Priority per Day (prioritas 1/2)
+        if max_low_priority is not None:
+            low = [p for p in free_placements if is_low_priority(p['priority'])]
+            for p in low[int(max_low_priority):]:
+                violations.append(_violation(
+                    day, p['start_slot'], p['name'], 'global_max_low_priority_per_day',
+                    f"Lebih dari {int(max_low_priority)} aktivitas prioritas rendah pada {day}.",
+                ))
+
+        # 9. Global Max Work Days (hari dengan aktivitas non-fixed)
+        if free_placements:
+            work_days += 1
+            if max_work_days is not None and work_days > int(max_work_days):
+                violations.append(_violation(
+                    day, free_placements[0]['start_slot'], free_placements[0]['name'], 'global_max_work_days',
+                    f"{day} melebihi batas {int(max_work_days)} hari kerja per minggu.",
+                ))
+
+        # --- Batasan per-task ---
+        for p in free_placements:
+            name = p['name']
+            activity = activities_indexed_by_name.get(name, {})
+            act_constraints = constraints.get(name, {}) if name else {}
+            if not isinstance(act_constraints, dict):
+                act_constraints = {}
+
+            task_earliest = (
+                activity.get('earliest_start') or
+                act_constraints.get('earliest_start') or
+                constraints.get('task_earliest_start')
+            )
+            if task_earliest and p['start_slot'] < get_slot_index(task_earliest):
+                violations.append(_violation(
+                    day, p['start_slot'], name, 'earliest_start',
+                    f"'{name}' dimulai sebelum {task_earliest}.",
+                ))
+
+            task_latest_end = (
+                activity.get('latest_end') or
+                act_constraints.get('latest_end') or
+                constraints.get('task_latest_end')
+            )
+            if task_latest_end and p['end_slot'] > get_slot_index(task_latest_end):
+                violations.append(_violation(
+                    day, p['start_slot'], name, 'latest_end',
+                    f"'{name}' selesai setelah {task_latest_end}.",
+                ))
+
+            start_minute = get_week_minute(day, p['start_slot'])
+            end_minute = get_week_minute(day, p['end_slot'])
+            for spec in parse_after(activity.get('after')):
+                is_self = spec[0] == name
+                starts, ends = intervals_by_name.get(spec[0], ([], []))
+                if is_self:
+                    # Interval milik penempatan ini sendiri tidak dihitung sebagai pendahulu
+                    starts = [m for m in starts if m != start_minute]
+                    ends = [m for m in ends if m != end_minute]
+                reason = precedence_violation(
+                    starts, ends, start_minute, end_minute, spec, is_self,
+                    get_week_minute(day, 0), spec[0] in activities_indexed_by_name,
+                )
+                if reason:
+                    violations.append(_violation(day, p['start_slot'], name, 'after', f"'{name}' {reason}."))
+
+    return violations
+
+def validate_data(data: Dict[str, Any], constraints: Dict) -> List[Dict[str, Any]]:
+    """Memvalidasi data['generated_schedule'] memakai activities dan fixed_schedule dari data yang sama."""
+    return validate_schedule(
+        data.get('generated_schedule') or {},
+        constraints,
+        activities=data.get('activities'),
+        fixed_schedule=data.get('fixed_schedule'),
+    )
+
+# --- Preferensi lunak ---
+def soft_penalties(schedule: Dict[str, Dict[Any, Any]], constraints: Dict) -> List[Dict[str, Any]]:
+    """
+    Menghitung ulang penalti constraints['soft_preferences'] dari jadwal lengkap (tanpa state solver),
+    satu entri per aturan: rule (indeks), type, name, category, weight, penalty. Totalnya sama dengan
+    stats['soft_cost'] dari solver untuk jadwal yang sama.
+    """
+    rules = parse_soft_preferences((constraints or {}).get('soft_preferences'))
+    placements_by_day = extract_placements(schedule)
+    report = []
+    for i, rule in enumerate(rules):
+        penalty = 0.0
+        for day in DAYS:
+            matches = [
+                p for p in placements_by_day[day]
+                if not p['is_fixed'] and soft_rule_matches(rule, p['name'], p['category'])
+            ]
+            if rule['type'] == 'prefer_window':
+                penalty += rule['weight'] * sum(
+                    (p['end_slot'] - p['start_slot']) - max(0, min(p['end_slot'], rule['end']) - max(p['start_slot'], rule['start']))
+                    for p in matches
+                )
+            elif rule['type'] == 'avoid_after':
+                penalty += rule['weight'] * sum(max(0, p['end_slot'] - max(p['start_slot'], rule['after'])) for p in matches)
+            elif rule['type'] == 'avoid_days':
+                penalty += rule['weight'] * len(matches) * rule['days'].count(day)
+            else:
+                penalty += rule['weight'] * len(matches) * (len(matches) - 1) / 2
+        report.append({
+            'rule': i, 'type': rule['type'], 'name': rule['name'], 'category': rule['category'],
+            'weight': rule['weight'], 'penalty': penalty,
+        })
+    return report
+
+# --- Diff ---
+def _placement_summary(day: str, p: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'name': p['name'],
+        'day': day,
+        'start_time': get_time_from_index(p['start_slot']),
+        'end_time': get_time_from_index(p['end_slot']),
+        'is_fixed': p['is_fixed'],
+    }
+
+def diff_schedules(old: Dict[str, Dict[Any, Any]], new: Dict[str, Dict[Any, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Membandingkan dua jadwal per blok penempatan.
+    Penempatan identik (nama, hari, slot) dianggap tidak berubah; sisanya dipasangkan per nama
+    secara kronologis sebagai 'moved', dan yang tidak berpasangan menjadi 'added' / 'removed'.
+    """
+    def keyed(schedule):
+        result: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for day, placements in extract_placements(schedule).items():
+            for p in placements:
+                key = (p['name'], day, p['start_slot'], p['end_slot'])
+                result.setdefault(key, []).append(_placement_summary(day, p))
+        return result
+
+    old_keyed, new_keyed = keyed(old), keyed(new)
+
+    removed_by_name: Dict[str, List[Dict[str, Any]]] = {}
+    added_by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for key in sorted(set(old_keyed) | set(new_keyed), key=lambda k: (str(k[0]), DAYS.index(k[1]), k[2])):
+        old_list, new_list = old_keyed.get(key, []), new_keyed.get(key, [])
+        common = min(len(old_list), len(new_list))
+        removed_by_name.setdefault(key[0], []).extend(old_list[common:])
+        added_by_name.setdefault(key[0], []).extend(new_list[common:])
+
+    moved, added, removed = [], [], []
+    for name in removed_by_name:
+        olds, news = removed_by_name[name], added_by_name[name]  # kedua dict selalu berbagi key yang sama
+        pairs = min(len(olds), len(news))
+        for src, dst in zip(olds[:pairs], news[:pairs]):
+            moved.append({'name': name, 'from': src, 'to': dst})
+        removed.extend(olds[pairs:])
+        added.extend(news[pairs:])
+
+    return {'moved': moved, 'added': added, 'removed': removed}
+
+# --- Audit batch ---
+def audit_files(paths: Iterable[str], constraints: Dict) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Memvalidasi banyak file data.json satu per satu (streaming) dan menghasilkan (path, violations).
+    File yang tidak bisa dibaca dilaporkan sebagai satu pelanggaran 'unreadable'.
+    """
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            yield path, [{
+                'day': None, 'slot': None, 'time': None, 'name': None,
+                'constraint': 'unreadable', 'message': f"Gagal membaca file: {e}",
+            }]
+            continue
+        yield path, validate_data(data, constraints)
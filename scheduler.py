@@ -1,4 +1,5 @@
 import time
+from bisect import bisect_right
 from typing import Dict, List, Any
 from rich.console import Console
 from rich.panel import Panel
@@ -10,13 +11,19 @@ import pyfiglet
 
 # Import dari file lokal
 import data_manager # Asumsi file ini ada
-from csp_solver import solve_csp, get_slot_index, get_time_from_index, CONSTANTS # Asumsi file ini ada dan sudah diupdate
+import schedule_export
+import schedule_import
+import diagnosis
+from csp_solver import solve_csp, get_slot_index, get_time_from_index, iter_day_placements, CONSTANTS # Asumsi file ini ada dan sudah diupdate
 
 # --- Konstanta & Inisialisasi ---
 console = Console()
 DAYS = CONSTANTS["DAYS"]
 TIME_SLOTS = CONSTANTS["TIME_SLOTS"]
 SLOT_DURATION = CONSTANTS["SLOT_DURATION"]
+SLOTS_PER_DAY = CONSTANTS["SLOTS_PER_DAY"]
+DIAGNOSIS_TIME_LIMIT = 10  # detik; diagnosis berhenti dan melaporkan konflik yang mungkin belum minimal
+SOFT_OPTIMIZE_TIME_LIMIT = 20  # detik; setelahnya dipakai jadwal terbaik yang sudah ditemukan
 
 # Daftar Pilihan Constraint Global Default Waktu
 GLOBAL_TIME_DEFAULTS = {
@@ -33,6 +40,14 @@ GLOBAL_CONSTRAINTS = {
     'global_max_work_days': "Maksimal Hari Bekerja dalam Seminggu"
 }
 
+# Jenis Preferensi Lunak (soft_preferences): boleh dilanggar, tapi solver meminimalkan total penalti berbobot
+SOFT_PREFERENCE_TYPES = {
+    'prefer_window': "Sebaiknya di jam tertentu (mis. Gym pagi)",
+    'avoid_after': "Hindari setelah jam tertentu (mis. Belajar malam)",
+    'avoid_days': "Hindari hari tertentu",
+    'different_days': "Sebaiknya di hari berbeda (mis. Kerkom Web)",
+}
+
 # --- Fungsi Utility Tampilan & Animasi ---
 
 def show_welcome_screen():
@@ -255,82 +270,134 @@ def input_constraints(data: Dict) -> Dict:
                  val = IntPrompt.ask(f"  > Masukkan Nilai ({desc}) (Angka)", default=1)
                  
             current_constraints[key] = val
-            
+
+    # 4. PREFERENSI LUNAK (Soft)
+    console.print("\n[bold cyan]4. PREFERENSI LUNAK[/bold cyan] (Boleh dilanggar; bobot besar = lebih diutamakan)")
+    soft_preferences = []
+    while unique_activities and Prompt.ask("Tambah preferensi? [y/n]", choices=['y', 'n'], default='n') == 'y':
+        for key, desc in SOFT_PREFERENCE_TYPES.items():
+            console.print(f"  [yellow]{key}[/yellow]: {desc}")
+        pref_type = Prompt.ask("  > Jenis preferensi", choices=list(SOFT_PREFERENCE_TYPES), default='prefer_window')
+        name = Prompt.ask("  > Nama aktivitas", choices=unique_activities)
+        preference = {'type': pref_type, 'name': name}
+        if pref_type == 'prefer_window':
+            preference['start'] = Prompt.ask("  > Mulai jendela (HH:MM)", default="06:00")
+            preference['end'] = Prompt.ask("  > Akhir jendela (HH:MM)", default="10:00")
+        elif pref_type == 'avoid_after':
+            preference['time'] = Prompt.ask("  > Hindari setelah (HH:MM)", default="21:00")
+        elif pref_type == 'avoid_days':
+            preference['days'] = [day.strip() for day in Prompt.ask("  > Hari (pisahkan dengan koma)", default="Jumat").split(',')]
+        preference['weight'] = IntPrompt.ask("  > Bobot (1-10)", default=3)
+        soft_preferences.append(preference)
+    if soft_preferences:
+        current_constraints['soft_preferences'] = soft_preferences
+        if Prompt.ask("Cari jadwal optimal (lebih lama)? [y/n]", choices=['y', 'n'], default='n') == 'y':
+            current_constraints['soft_optimize'] = True
+            current_constraints['time_limit'] = SOFT_OPTIMIZE_TIME_LIMIT
+
     return current_constraints
 
 # --- Fungsi Tampilan Output ---
 
-def display_calendar(schedule: Dict):
-    """Menampilkan jadwal dalam bentuk grid kalender mingguan."""
-    clear_screen()
-    console.rule("[bold green] 📅 JADWAL MINGGUAN TER-EFEKTIF [/bold green]")
+CALENDAR_PAGE_HOURS = 6  # jumlah jam per halaman saat menjelajah kalender
+
+def build_calendar_grid(schedule: Dict) -> Dict[str, Any]:
+    """
+    Menyiapkan grid hari x slot sekali saja: slot berurutan digabung menjadi blok berlabel
+    (lihat iter_day_placements), terurut per hari agar jendela tampilan bisa dicari dengan bisect.
+    """
+    blocks = {day: list(iter_day_placements(schedule.get(day, {}))) for day in DAYS}
+    return {
+        'blocks': blocks,
+        'ends': {day: [b['end_slot'] for b in day_blocks] for day, day_blocks in blocks.items()},
+    }
+
+def _visible_blocks(grid: Dict[str, Any], day: str, start_slot: int, end_slot: int) -> List[Dict]:
+    """Blok pada day yang bersinggungan dengan [start_slot, end_slot), O(log n + blok terlihat)."""
+    day_blocks = grid['blocks'][day]
+    result = []
+    for i in range(bisect_right(grid['ends'][day], start_slot), len(day_blocks)):
+        if day_blocks[i]['start_slot'] >= end_slot:
+            break
+        result.append(day_blocks[i])
+    return result
+
+def render_calendar(grid: Dict[str, Any], days: List[str], start_slot: int, end_slot: int) -> Table:
+    """Membangun Table rich hanya untuk jendela yang terlihat (hari terpilih, [start_slot, end_slot))."""
+    slots_per_row = max(1, 60 // SLOT_DURATION)
+    row_count = (end_slot - start_slot + slots_per_row - 1) // slots_per_row
 
-    # Hitung total jam
-    total_hours_per_activity: Dict[str, float] = {}
-    total_slots_filled = 0
-    
-    for day_slots in schedule.values():
-        for slot_data in day_slots.values():
-            if slot_data:
-                name = slot_data['name']
-                is_fixed = slot_data.get('is_fixed', False)
-                # Hanya hitung slot pertama jika durasi lebih dari 30 menit,
-                # atau jika itu adalah jadwal fixed/locked yang mungkin sudah terdaftar.
-                if slot_data.get('is_first_slot') or is_fixed or slot_data.get('is_locked'):
-                    # Asumsi durasi untuk non-fixed/non-locked/non-first-slot adalah 30 menit
-                    duration_minutes = SLOT_DURATION 
-                    if slot_data.get('duration_slots'):
-                         duration_minutes = slot_data['duration_slots'] * SLOT_DURATION
-                    elif is_fixed or slot_data.get('is_locked'):
-                         # Sulit mendapatkan durasi fixed/locked dari sini, tapi anggap 30 menit per slot
-                         duration_minutes = SLOT_DURATION
-                         
-                    total_hours_per_activity[name] = total_hours_per_activity.get(name, 0.0) + (duration_minutes / 60)
-                total_slots_filled += 1
-
-    # Inisialisasi Tabel
-    table = Table(title="Jadwal Mingguan (06:00 - 00:00)", show_lines=True, header_style="bold blue")
+    title = f"Jadwal Mingguan ({get_time_from_index(start_slot)} - {get_time_from_index(end_slot)})"
+    table = Table(title=title, header_style="bold blue", row_styles=["", "dim"])
     table.add_column("Waktu")
-    for day in DAYS:
+    for day in days:
         table.add_column(day, justify="center")
 
-    # Isi Tabel per 30 Menit
-    current_time_slots = TIME_SLOTS[::2] # Ambil per jam
-    
-    for i in range(0, len(TIME_SLOTS), 2):
-        start_time = TIME_SLOTS[i]
-        
-        row_content = [f"[bold]{start_time}[/bold]"]
-        
-        # Periksa slot 30 menit (i dan i+1) untuk setiap hari
-        for day in DAYS:
-            slot_i = schedule[day].get(str(i))
-            slot_i_plus_1 = schedule[day].get(str(i + 1))
-            
-            cell_content = ""
-            
-            # Jika ada aktivitas di jam penuh (slot i)
-            if slot_i and slot_i.get("is_first_slot"):
-                name = slot_i['name']
-                style = "bold green" if not slot_i.get("is_fixed") else "bold yellow"
-                lock_icon = " 🔒" if slot_i.get("is_locked") else ""
-                
-                # Cek durasi untuk merge cell (hanya visual, Rich tidak punya merge cell vertikal)
-                # Kita hanya menampilkan nama di slot pertama.
-                cell_content = f"[{style}]{name}{lock_icon}[/{style}]"
-            
-            # Jika ada aktivitas di menit ke-30 (slot i+1)
-            elif slot_i_plus_1 and slot_i_plus_1.get("is_first_slot"):
-                name = slot_i_plus_1['name']
-                style = "bold green" if not slot_i_plus_1.get("is_fixed") else "bold yellow"
-                lock_icon = " 🔒" if slot_i_plus_1.get("is_locked") else ""
-                cell_content = f"[{style}]{name}{lock_icon}[/{style}] (30 menit)"
-
-            row_content.append(cell_content)
-            
-        table.add_row(*row_content)
+    cells = {day: [[] for _ in range(row_count)] for day in days}
+    for day in days:
+        for block in _visible_blocks(grid, day, start_slot, end_slot):
+            first_row = (max(block['start_slot'], start_slot) - start_slot) // slots_per_row
+            last_row = (min(block['end_slot'], end_slot) - 1 - start_slot) // slots_per_row
+            style = "bold yellow" if block['is_fixed'] else "bold green"
+            lock_icon = " 🔒" if block['is_locked'] else ""
+            span = f"{get_time_from_index(block['start_slot'])}-{get_time_from_index(block['end_slot'])}"
+            if block['start_slot'] >= start_slot:
+                cells[day][first_row].append(f"[{style}]{block['name']}{lock_icon}[/{style}] ({span})")
+            else:
+                cells[day][first_row].append(f"[{style}]↑ {block['name']}[/{style}]")
+            for row in range(first_row + 1, last_row + 1):
+                cells[day][row].append(f"[dim]│ {block['name']}[/dim]")
+
+    for row in range(row_count):
+        row_start = start_slot + row * slots_per_row
+        table.add_row(f"[bold]{get_time_from_index(row_start)}[/bold]", *("\n".join(cells[day][row]) for day in days))
+    return table
+
+def display_calendar(schedule: Dict, days: List[str] = None, start_time: str = None, end_time: str = None,
+                     grid: Dict[str, Any] = None):
+    """Menampilkan jadwal dalam bentuk grid kalender mingguan, dapat difilter per hari dan rentang jam."""
+    clear_screen()
+    console.rule("[bold green] 📅 JADWAL MINGGUAN TER-EFEKTIF [/bold green]")
+
+    grid = grid or build_calendar_grid(schedule)
+    days = [day for day in (days or DAYS) if day in DAYS]
+    start_slot = max(0, get_slot_index(start_time)) if start_time else 0
+    end_slot = min(SLOTS_PER_DAY, get_slot_index(end_time)) if end_time else SLOTS_PER_DAY
+    if end_slot <= start_slot:
+        end_slot = SLOTS_PER_DAY
+
+    console.print(render_calendar(grid, days, start_slot, end_slot))
+
+    # Total jam per aktivitas (hanya untuk hari yang ditampilkan)
+    totals: Dict[str, float] = {}
+    for day in days:
+        for block in grid['blocks'][day]:
+            totals[block['name']] = totals.get(block['name'], 0.0) + \
+                (block['end_slot'] - block['start_slot']) * SLOT_DURATION / 60
+    if totals:
+        summary = "  ".join(f"{name}: {hours:g} jam" for name, hours in sorted(totals.items(), key=lambda x: -x[1]))
+        console.print(f"[dim]Total: {summary}[/dim]")
+
+def browse_calendar(schedule: Dict):
+    """Menjelajah kalender per halaman jam, dengan filter hari (grid dibangun sekali)."""
+    grid = build_calendar_grid(schedule)
+    choice = Prompt.ask("Tampilkan hari", choices=['Semua'] + DAYS, default='Semua')
+    days = DAYS if choice == 'Semua' else [choice]
+
+    page_slots = CALENDAR_PAGE_HOURS * 60 // SLOT_DURATION
+    page = 0
+    page_count = (SLOTS_PER_DAY + page_slots - 1) // page_slots
+    while True:
+        start_slot = page * page_slots
+        end_slot = min(SLOTS_PER_DAY, start_slot + page_slots)
+        display_calendar(schedule, days, get_time_from_index(start_slot),
+                         get_time_from_index(end_slot) if end_slot < SLOTS_PER_DAY else None, grid=grid)
+        console.print(f"[dim]Halaman {page + 1}/{page_count}[/dim]")
+        action = Prompt.ask("[n]ext / [p]rev / [q]uit", choices=['n', 'p', 'q'], default='n' if page + 1 < page_count else 'q')
+        if action == 'q':
+            break
+        page = min(page_count - 1, page + 1) if action == 'n' else max(0, page - 1)
 
-    console.print(table)
 # --- Fungsi Penjadwalan & Edit Manual ---
 
 def generate_schedule(data: Dict):
@@ -346,12 +413,20 @@ def generate_schedule(data: Dict):
     show_spinner("Memecahkan Penjadwalan dengan CSP Backtracking...")
     
     # Catatan: Batasan per-tugas sudah tersimpan dalam `constraints` di bawah nama tugas
-    new_schedule, status = solve_csp(data, constraints)
+    stats = {}
+    new_schedule, status = solve_csp(data, constraints, stats=stats)
     
     if status == "SUCCESS":
         data['generated_schedule'] = new_schedule
         data_manager.save_data(data)
         display_calendar(new_schedule)
+        if 'soft_cost' in stats:
+            note = " (optimal)" if stats.get('soft_optimal') else ""
+            console.print(f"\n[cyan]Penalti preferensi lunak: {stats['soft_cost']:g}{note}[/cyan]")
+        if stats.get('skips'):
+            console.print(f"\n[yellow]⚠️ {stats['skips']} aktivitas tidak mendapat slot dan dilewati.[/yellow]")
+            if Prompt.ask("Cari penyebabnya? [y/n]", choices=['y', 'n'], default='y') == 'y':
+                show_diagnosis(data, constraints, known_infeasible=False)
         Prompt.ask("Tekan [bold]ENTER[/bold] untuk kembali ke Menu Utama...")
     else:
         console.print(Panel(
@@ -359,9 +434,22 @@ def generate_schedule(data: Dict):
             subtitle="Jadwal terlalu padat atau constraints terlalu ketat.",
             border_style="red"
         ))
-        console.print("\n[yellow]Saran:[/yellow] Coba hilangkan beberapa constraint, kurangi durasi, atau tingkatkan prioritas aktivitas yang paling penting.")
+        show_diagnosis(data, constraints, known_infeasible=not stats.get('aborted'))
         Prompt.ask("Tekan [bold]ENTER[/bold] untuk kembali ke Menu Utama...")
 
+def show_diagnosis(data: Dict, constraints: Dict, known_infeasible: bool):
+    """Menampilkan himpunan konflik minimal (constraint + aktivitas) penyebab jadwal tidak feasible."""
+    with console.status("[bold yellow]Mendiagnosis konflik constraint...[/bold yellow]", spinner="dots"):
+        result = diagnosis.diagnose(data, constraints, known_infeasible=known_infeasible, time_limit=DIAGNOSIS_TIME_LIMIT)
+
+    if result['status'] == 'CONFLICT':
+        note = "" if result['minimal'] else " [dim](mungkin belum minimal, batas pencarian tercapai)[/dim]"
+        console.print(f"\n[bold red]Konflik:[/bold red] {result['message']}{note}")
+        console.print("[yellow]Saran:[/yellow] Konflik ini hilang jika salah satu unsur di atas dilonggarkan (konflik lain mungkin masih ada).")
+    else:
+        console.print("\n[yellow]Saran:[/yellow] Coba hilangkan beberapa constraint, kurangi durasi, atau tingkatkan prioritas aktivitas yang paling penting.")
+    console.print(f"[dim]Diagnosis: {result['checks']} sub-solve, {result['bound_proofs']} dibuktikan lewat batas kapasitas, {result['seconds']:.2f} detik.[/dim]")
+
 def edit_manual_schedule(data: Dict):
     """Memungkinkan user untuk mengedit dan mengunci slot jadwal."""
     
@@ -414,6 +502,51 @@ def edit_manual_schedule(data: Dict):
     data_manager.save_data(data)
     Prompt.ask("Tekan [bold]ENTER[/bold] untuk melanjutkan...")
 
+def export_schedule_menu(data: Dict):
+    """Mengekspor jadwal terakhir ke file iCalendar (.ics) atau CSV."""
+    if not data.get('generated_schedule'):
+        console.print("[bold red]❌ Gagal:[/bold red] Jadwal belum pernah di-generate!")
+        Prompt.ask("Tekan [bold]ENTER[/bold] untuk kembali...")
+        return
+
+    clear_screen()
+    console.rule("[bold yellow] 📤 EKSPOR JADWAL [/bold yellow]")
+
+    fmt = Prompt.ask("Format", choices=['ics', 'csv'], default='ics')
+    file_path = Prompt.ask("Nama File", default=f"jadwal.{fmt}")
+    try:
+        count = schedule_export.export_schedule(data['generated_schedule'], file_path, fmt)
+    except OSError as e:
+        console.print(f"[bold red]❌ Gagal mengekspor:[/bold red] {e}")
+    else:
+        console.print(f"[bold green]✅ {count} event berhasil diekspor ke {file_path}.[/bold green]")
+    Prompt.ask("Tekan [bold]ENTER[/bold] untuk melanjutkan...")
+
+def import_schedule_menu(data: Dict):
+    """Impor massal jadwal tetap dan aktivitas dari file CSV atau iCalendar (.ics)."""
+    clear_screen()
+    console.rule("[bold yellow] 📥 IMPOR JADWAL DARI FILE [/bold yellow]")
+    console.print("[dim]Kolom CSV: type (fixed/activity), name, day, start_time, end_time, duration, priority, count, category[/dim]")
+
+    file_path = Prompt.ask("Path File (.csv/.ics)", default="jadwal.csv")
+    try:
+        report = schedule_import.import_file(data, file_path)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]❌ Gagal membaca file:[/bold red] {e}")
+        Prompt.ask("Tekan [bold]ENTER[/bold] untuk kembali...")
+        return
+
+    console.print(f"[bold green]✅ {report['fixed_added']} jadwal tetap dan {report['activities_added']} aktivitas berhasil diimpor.[/bold green]")
+    if report['errors']:
+        error_table = Table(title=f"{len(report['errors'])} Baris Dilewati", header_style="bold red")
+        error_table.add_column("Baris", justify="right")
+        error_table.add_column("Nama")
+        error_table.add_column("Masalah")
+        for error in report['errors']:
+            error_table.add_row(str(error['row']), error['name'], error['message'])
+        console.print(error_table)
+    Prompt.ask("Tekan [bold]ENTER[/bold] untuk melanjutkan...")
+
 # --- Main Program ---
 
 def main_menu():
@@ -498,12 +631,14 @@ def main_menu():
         menu_table.add_row("[bold]3.[/bold] [green]GENERATE JADWAL (CSP)[/green] 🚀")
         menu_table.add_row("[bold]4.[/bold] Lihat Jadwal Terakhir 👀")
         menu_table.add_row("[bold]5.[/bold] Edit/Kunci Manual Jadwal 🔒")
-        menu_table.add_row("[bold]6.[/bold] Reset Semua Data 🗑️")
-        menu_table.add_row("[bold]7.[/bold] Keluar 🚪")
+        menu_table.add_row("[bold]6.[/bold] Ekspor Jadwal (.ics/.csv) 📤")
+        menu_table.add_row("[bold]7.[/bold] Impor Jadwal dari File (.csv/.ics) 📥")
+        menu_table.add_row("[bold]8.[/bold] Reset Semua Data 🗑️")
+        menu_table.add_row("[bold]9.[/bold] Keluar 🚪")
         
         console.print(menu_table)
         
-        choice = Prompt.ask("Pilih Menu", choices=['1', '2', '3', '4', '5', '6', '7'], default='3')
+        choice = Prompt.ask("Pilih Menu", choices=['1', '2', '3', '4', '5', '6', '7', '8', '9'], default='3')
         
         if choice == '1':
             input_fixed_schedule(data)
@@ -513,19 +648,23 @@ def main_menu():
             generate_schedule(data)
         elif choice == '4':
             if data.get('generated_schedule'):
-                display_calendar(data['generated_schedule'])
+                browse_calendar(data['generated_schedule'])
             else:
                 console.print("[bold red]❌ Jadwal belum pernah di-generate![/bold red]")
             Prompt.ask("Tekan [bold]ENTER[/bold] untuk kembali...")
         elif choice == '5':
             edit_manual_schedule(data)
         elif choice == '6':
+            export_schedule_menu(data)
+        elif choice == '7':
+            import_schedule_menu(data)
+        elif choice == '8':
             if Prompt.ask("❗❗ Yakin ingin mereset semua data?", choices=['ya', 'tidak'], default='tidak') == 'ya':
                 data = data_manager.load_data() # Memuat ulang kosong
                 data_manager.save_data(data)
                 console.print("[bold green]✅ Semua data berhasil di-reset.[/bold green]")
             Prompt.ask("Tekan [bold]ENTER[/bold] untuk melanjutkan...")
-        elif choice == '7':
+        elif choice == '9':
             console.print(Panel(Text("Sampai jumpa! Semoga jadwalmu efektif. 🎉", justify="center"), border_style="red"))
             break
 
@@ -0,0 +1,36 @@
+import copy
+import json
+
+from csp_solver import solve_csp
+import diagnosis
+
+# Regresi: diagnosis tidak boleh menyentuh checkpoint atau mewarisi time_limit solve pengguna.
+# Jalankan: python -m pytest -q test_diagnosis.py
+
+def _infeasible_data():
+    return {
+        'fixed_schedule': [],
+        'activities': [{'id': f"k{i}", 'name': f"Kerja {i}", 'duration': 6, 'priority': 5} for i in range(3)],
+        'generated_schedule': {},
+    }
+
+def test_diagnosis_leaves_checkpoint_untouched(tmp_path):
+    checkpoint = tmp_path / "data.checkpoint.json"
+    checkpoint.write_text(json.dumps({'version': 1, 'fingerprint': 'solve pengguna', 'stack': []}))
+    before = checkpoint.read_bytes()
+    constraints = {
+        'global_max_hours_per_day': 8,
+        'global_max_work_days': 2,
+        'allow_skip_unplaceable': False,
+        'checkpoint_path': str(checkpoint),
+        'checkpoint_every_nodes': 1,
+        'time_limit': 1e-9,
+    }
+
+    _, status = solve_csp(_infeasible_data(), {**constraints, 'checkpoint_path': None, 'time_limit': None})
+    assert status == 'FAILURE'
+
+    result = diagnosis.diagnose(copy.deepcopy(_infeasible_data()), constraints, known_infeasible=True)
+    assert result['status'] == 'CONFLICT'
+    assert result['aborted_checks'] == 0
+    assert checkpoint.read_bytes() == before
@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+import schedule_daemon
+
+# Regresi: hasil solve tidak boleh menimpa data yang diedit selama solve berjalan.
+# Jalankan: python -m pytest -q test_schedule_daemon.py
+
+def _write_data(path):
+    data = {
+        'fixed_schedule': [],
+        'activities': [{'id': f"a{i}", 'name': f"Aktivitas {i}", 'duration': 2, 'priority': 3} for i in range(12)],
+        'generated_schedule': {'Senin': {'0': {'name': 'Lama', 'priority': 3, 'duration_slots': 1, 'is_first_slot': True}}},
+    }
+    path.write_text(json.dumps(data))
+
+def test_edit_during_solve_is_not_overwritten(tmp_path):
+    path = tmp_path / "data.json"
+    _write_data(path)
+
+    async def scenario():
+        daemon = schedule_daemon.SchedulerDaemon(workers=1)
+        try:
+            await daemon.op_load({'user': 'andi', 'path': str(path)})
+            solve = asyncio.create_task(daemon.handle_request({
+                'op': 'solve', 'user': 'andi', 'constraints': {'global_min_gap': 30}, 'save': True,
+            }))
+            while 'andi' not in daemon.inflight:
+                await asyncio.sleep(0)
+            edit = await daemon.handle_request({
+                'op': 'edit', 'user': 'andi', 'day': 'Senin', 'time': '06:00', 'action': 'ganti_nama', 'name': 'Baru',
+            })
+            return edit, await solve
+        finally:
+            daemon.pool.shutdown()
+
+    edit, solve = asyncio.run(scenario())
+    assert edit['ok']
+    assert not solve['ok'] and 'berubah selama solve' in solve['error']
+    saved = json.loads(path.read_text())
+    assert saved['generated_schedule']['Senin']['0']['name'] == 'Baru'
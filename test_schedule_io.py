@@ -0,0 +1,48 @@
+from csp_solver import solve_csp, get_slot_index, iter_day_placements
+from schedule_export import export_schedule
+from schedule_import import import_records, iter_records
+
+# Regresi: jadwal hasil ekspor (CSV/ICS) harus bisa diimpor kembali tanpa kehilangan blok.
+# Jalankan: python -m pytest -q test_schedule_io.py
+
+def _solved_with_midnight_block():
+    data = {
+        'fixed_schedule': [{'name': 'Malam', 'day': 'Senin', 'start_time': '22:00', 'end_time': '24:00', 'is_locked': True}],
+        'activities': [{'id': 'g1', 'name': 'Gym', 'duration': 1, 'priority': 3}],
+        'generated_schedule': {},
+    }
+    schedule, status = solve_csp(data, {})
+    assert status == 'SUCCESS'
+    return schedule
+
+def test_midnight_fixed_block_round_trips(tmp_path):
+    schedule = _solved_with_midnight_block()
+    for fmt in ('csv', 'ics'):
+        path = str(tmp_path / f"jadwal.{fmt}")
+        export_schedule(schedule, path)
+
+        data = {'fixed_schedule': [], 'activities': [], 'generated_schedule': {}}
+        report = import_records(data, iter_records(path))
+        assert report['errors'] == [], fmt
+        assert [f['end_time'] for f in data['fixed_schedule']] == ['24:00'], fmt
+
+        solved, status = solve_csp(data, {})
+        assert status == 'SUCCESS', fmt
+        blocks = [b for b in iter_day_placements(solved['Senin']) if b['is_fixed']]
+        assert [(b['name'], b['start_slot'], b['end_slot']) for b in blocks] == [
+            ('Malam', get_slot_index('22:00'), get_slot_index('24:00')),
+        ], fmt
+
+def test_overlap_detected_behind_long_existing_block():
+    # Blok panjang yang ada menutupi blok pendek sesudahnya; baris baru di antaranya tetap bentrok
+    data = {
+        'fixed_schedule': [
+            {'name': 'Praktikum', 'day': 'Senin', 'start_time': '08:00', 'end_time': '16:00'},
+            {'name': 'Asistensi', 'day': 'Senin', 'start_time': '09:00', 'end_time': '10:00'},
+        ],
+        'activities': [],
+    }
+    record = {'type': 'fixed', 'name': 'Rapat', 'day': 'Senin', 'start_time': '13:00', 'end_time': '14:00'}
+    report = import_records(data, iter([(2, record)]))
+    assert report['fixed_added'] == 0
+    assert 'Praktikum' in report['errors'][0]['message']
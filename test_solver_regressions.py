@@ -0,0 +1,48 @@
+import copy
+import random
+
+from bench_solver import make_dense_week
+from csp_solver import solve_csp
+from schedule_validator import validate_schedule
+
+# Regresi: setiap jadwal SUCCESS dari solver harus lolos validate_schedule.
+# Jalankan: python -m pytest -q test_solver_regressions.py
+
+def _solve_and_validate(data, constraints):
+    schedule, status = solve_csp(data, constraints)
+    return status, validate_schedule(schedule, constraints, data['activities'], data['fixed_schedule'])
+
+def test_predecessor_placed_later_respects_min_gap():
+    # A kedua (prioritas rendah) ditempatkan setelah B dan tidak boleh masuk ke jarak 48 jam sebelum B
+    activities = [
+        {'id': 'a1', 'name': 'A', 'duration': 1, 'priority': 5},
+        {'id': 'b', 'name': 'B', 'duration': 1, 'priority': 3, 'after': [{'name': 'A', 'min_gap_hours': 48}]},
+        {'id': 'a2', 'name': 'A', 'duration': 1, 'priority': 1},
+    ]
+    data = {'fixed_schedule': [], 'activities': activities, 'generated_schedule': {}}
+    status, violations = _solve_and_validate(data, {'value_ordering': 'none'})
+    assert status == 'SUCCESS'
+    assert violations == []
+
+def test_dense_weeks_with_after_specs_validate():
+    for seed in range(20):
+        rng = random.Random(seed)
+        data = make_dense_week(seed, 0.5)
+        names = sorted({act['name'] for act in data['activities']})
+        specs = {
+            name: [{'name': rng.choice(names), 'min_gap_hours': rng.choice([2, 12, 24, 48]), 'same_day': rng.random() < 0.3}]
+            for name in names if rng.random() < 0.5
+        }
+        for act in data['activities']:
+            if act['name'] in specs:
+                act['after'] = specs[act['name']]
+        for ordering in ('none', 'lcv'):
+            constraints = {
+                'task_earliest_start': '08:00',
+                'task_latest_end': '22:00',
+                'value_ordering': ordering,
+                'max_search_nodes': 3000,
+            }
+            status, violations = _solve_and_validate(copy.deepcopy(data), constraints)
+            if status == 'SUCCESS':
+                assert violations == [], (seed, ordering)